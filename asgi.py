@@ -0,0 +1,367 @@
+"""
+ASGI entry point for serving the app with an async MongoDB client.
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:application --workers 4
+
+Read endpoints that mostly wait on MongoDB are served natively with motor,
+so a slow query holds no thread and independent queries run concurrently.
+The event stream and long poll are served natively too, so an open page
+waits on the event loop rather than holding a thread. Native responses get
+the same CORS headers, Server-Timing header and request log line as Flask's.
+
+Every other route, and any request without a valid session cookie, is
+handled by the regular Flask app through asgiref's WsgiToAsgi adapter. It
+runs on a pool of WSGI_THREADS threads; asgiref's default would run every
+Flask request on one shared thread, one at a time.
+"""
+import asyncio
+import datetime
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask_cors.core import get_cors_headers, get_cors_options
+from itsdangerous import BadSignature
+from werkzeug.datastructures import Headers
+from werkzeug.http import http_date, is_resource_modified, parse_cookie
+from app import create_app
+from models import Message, PublicProfile, User
+from models.events import event_bus
+from views.events import (
+    EVENT_STREAM_HEARTBEAT,
+    EVENT_STREAM_MAX_AGE,
+    LONG_POLL_TIMEOUT,
+    format_event,
+    parse_event_id,
+)
+from web.compression import choose_encoding, compress_body
+from web.instrumentation import RequestStats, async_request_stats
+
+
+class PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    """WsgiToAsgi request handler that runs the WSGI app on an executor."""
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        # The base class runs the app with sync_to_async's thread_sensitive
+        # default, which funnels every request through a single thread
+        run_wsgi_app = vars(WsgiToAsgiInstance)["run_wsgi_app"].__wrapped__
+        self.run_wsgi_app = sync_to_async(
+            run_wsgi_app.__get__(self), thread_sensitive=False, executor=executor
+        )
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi adapter serving requests concurrently on a thread pool."""
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        instance = PooledWsgiToAsgiInstance(self.wsgi_application, self.executor)
+        await instance(scope, receive, send)
+
+
+app = create_app()
+wsgi_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("WSGI_THREADS", "32")), thread_name_prefix="wsgi"
+)
+flask_application = PooledWsgiToAsgi(app, wsgi_executor)
+instrumentation = app.extensions["instrumentation"]
+# CORS(app) applies its default options to every route
+cors_options = get_cors_options(app)
+
+
+def _headers(scope):
+    """Decode the request headers of a scope into a dict."""
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+
+
+def session_user_id(headers):
+    """Return the user ID stored in the Flask session cookie, or None."""
+    cookie = parse_cookie(headers.get("cookie", "")).get(app.config["SESSION_COOKIE_NAME"])
+    if not cookie:
+        return None
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        session = serializer.loads(
+            cookie, max_age=int(app.permanent_session_lifetime.total_seconds())
+        )
+    except BadSignature:
+        return None
+    return session.get("_user_id")
+
+
+async def send_response(send, headers, status, body=b"", extra_headers=()):
+    """Send a complete response, compressing JSON bodies the client accepts."""
+    response_headers = [(b"vary", b"Accept-Encoding, Cookie")]
+    response_headers.extend(
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in extra_headers
+    )
+    if body:
+        response_headers.append((b"content-type", b"application/json"))
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is not None and len(body) >= app.config.get("COMPRESS_MIN_SIZE", 500):
+            body = compress_body(body, encoding)
+            response_headers.append((b"content-encoding", encoding.encode()))
+    response_headers.append((b"content-length", str(len(body)).encode()))
+
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def json_body(payload):
+    """Encode a payload with the app's JSON provider."""
+    return app.json.dumps(payload).encode()
+
+
+def _query(scope):
+    """Decode the query string of a scope into a dict of first values."""
+    query = parse_qs(scope["query_string"].decode("latin-1"))
+    return {name: values[0] for name, values in query.items()}
+
+
+async def public_profile(scope, receive, send, headers, current_user_id, user_id):
+    """
+    Async version of the get_public_user_profile view. The session's user
+    and the requested profile are looked up concurrently. Returns False
+    without responding if the session's user no longer exists.
+    """
+    try:
+        exists, profile = await asyncio.gather(
+            User.exists_async(current_user_id), PublicProfile.get_async(user_id)
+        )
+    except Exception as e:  # pylint: disable=broad-except
+        app.logger.error(f"Error fetching user profile: {str(e)}")
+        payload = {"status": "error", "message": f"Error retrieving user profile: {str(e)}"}
+        await send_response(send, headers, 500, json_body(payload))
+        return True
+    if not exists:
+        return False
+
+    if not profile:
+        payload = {"status": "error", "message": "User not found"}
+        await send_response(send, headers, 404, json_body(payload))
+        return True
+
+    last_modified = profile["last_modified"].astimezone(datetime.timezone.utc)
+    cache_headers = [
+        ("etag", f'"{profile["etag"]}"'),
+        ("last-modified", http_date(last_modified)),
+        ("cache-control", "private, no-cache"),
+    ]
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "HTTP_IF_NONE_MATCH": headers.get("if-none-match", ""),
+        "HTTP_IF_MODIFIED_SINCE": headers.get("if-modified-since", ""),
+    }
+    if not is_resource_modified(environ, etag=profile["etag"], last_modified=last_modified):
+        await send_response(send, headers, 304, extra_headers=cache_headers)
+        return True
+
+    payload = {"status": "success", "data": profile["data"]}
+    await send_response(send, headers, 200, json_body(payload), cache_headers)
+    return True
+
+
+async def conversations(scope, receive, send, headers, current_user_id):
+    """Async version of the get_conversations view; returns False like public_profile."""
+    exists, result = await asyncio.gather(
+        User.exists_async(current_user_id), Message.get_conversations_async(current_user_id)
+    )
+    if not exists:
+        return False
+    await send_response(send, headers, 200, json_body({"status": "success", "data": result}))
+    return True
+
+
+async def until_disconnect(receive, coroutine):
+    """
+    Run a coroutine until it finishes or the client disconnects, cancelling
+    it in that case. Returns False if the client disconnected.
+    """
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    task = asyncio.ensure_future(coroutine)
+    watcher = asyncio.ensure_future(disconnected())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        task.cancel()
+        watcher.cancel()
+        await asyncio.gather(task, watcher, return_exceptions=True)
+    if task.cancelled():
+        return False
+    # Raises the coroutine's exception, if any
+    task.result()
+    return True
+
+
+async def event_stream(scope, receive, send, headers, current_user_id):
+    """Async version of the stream_events view; returns False like public_profile."""
+    if not await User.exists_async(current_user_id):
+        return False
+    last_id = parse_event_id(
+        headers.get("last-event-id") or _query(scope).get("last_event_id")
+    )
+    if last_id is None:
+        last_id = event_bus.last_event_id()
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+
+    async def send_text(text):
+        await send({"type": "http.response.body", "body": text.encode(), "more_body": True})
+
+    async def stream():
+        nonlocal last_id
+        await send_text("retry: 5000\n\n")
+        closes_at = time.monotonic() + EVENT_STREAM_MAX_AGE
+        while time.monotonic() < closes_at:
+            events = await event_bus.wait_async(
+                current_user_id, last_id, timeout=EVENT_STREAM_HEARTBEAT
+            )
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                await send_text(": keep-alive\n\n")
+                continue
+            for event in events:
+                last_id = event["id"]
+                await send_text(format_event(event, app.json))
+
+    if await until_disconnect(receive, stream()):
+        await send({"type": "http.response.body"})
+    return True
+
+
+async def poll_events(scope, receive, send, headers, current_user_id):
+    """Async version of the poll_events view; returns False like public_profile."""
+    if not await User.exists_async(current_user_id):
+        return False
+    query = _query(scope)
+    last_id = parse_event_id(headers.get("last-event-id") or query.get("last_event_id"))
+
+    # A client without a last event ID only needs a starting point
+    if last_id is None:
+        payload = {"status": "success", "data": [], "last_event_id": event_bus.last_event_id()}
+        await send_response(send, headers, 200, json_body(payload))
+        return True
+
+    try:
+        timeout = float(query.get("timeout", LONG_POLL_TIMEOUT))
+    except ValueError:
+        timeout = LONG_POLL_TIMEOUT
+    events = await event_bus.wait_async(
+        current_user_id, last_id, timeout=max(0, min(timeout, LONG_POLL_TIMEOUT))
+    )
+    payload = {
+        "status": "success",
+        "data": events,
+        "last_event_id": events[-1]["id"] if events else last_id,
+    }
+    await send_response(send, headers, 200, json_body(payload))
+    return True
+
+
+# (path pattern, Flask endpoint, handler) for the GET routes served natively.
+# The endpoint names the route in logs and selects its REQUEST_BUDGETS.
+ASYNC_ROUTES = (
+    (
+        re.compile(r"^/api/users/public/(?P<user_id>[^/]+)$"),
+        "users.get_public_user_profile",
+        public_profile,
+    ),
+    (re.compile(r"^/api/messages$"), "messages.get_conversations", conversations),
+    (re.compile(r"^/api/events/stream$"), "events.stream_events", event_stream),
+    (re.compile(r"^/api/events$"), "events.poll_events", poll_events),
+)
+
+
+async def serve_natively(scope, receive, send, endpoint, handler, user_id, params):
+    """
+    Run a native handler with the CORS headers and instrumentation that Flask
+    adds to its responses. Returns what the handler returned.
+    """
+    headers = _headers(scope)
+    request_headers = Headers(
+        [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]]
+    )
+    cors_headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in get_cors_headers(
+            cors_options, request_headers, scope["method"]
+        ).items(multi=True)
+    ]
+    stats = RequestStats()
+    started = time.perf_counter()
+
+    async def instrumented_send(message):
+        if message["type"] == "http.response.start":
+            # Reported when the response starts, like Flask's after_request
+            total_ms = (time.perf_counter() - started) * 1000
+            response_headers = list(message["headers"]) + cors_headers
+            timing = instrumentation.timing_header(app, stats, total_ms)
+            if timing is not None:
+                response_headers.append((b"server-timing", timing.encode("latin-1")))
+            message = dict(message, headers=response_headers)
+            instrumentation.log(
+                stats, total_ms, scope["method"], scope["path"], endpoint, message["status"]
+            )
+        await send(message)
+
+    token = async_request_stats.set(stats)
+    try:
+        return await handler(scope, receive, instrumented_send, headers, user_id, **params)
+    finally:
+        async_request_stats.reset(token)
+
+
+async def lifespan(receive, send):
+    """Acknowledge server startup and shutdown."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            wsgi_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """Route natively served requests to their handlers and the rest to Flask."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        for pattern, endpoint, handler in ASYNC_ROUTES:
+            match = pattern.match(scope["path"])
+            if match is None:
+                continue
+            user_id = session_user_id(_headers(scope))
+            # A stale session falls through to Flask, which answers it the
+            # same way it would any other
+            if user_id and await serve_natively(
+                scope, receive, send, endpoint, handler, user_id, match.groupdict()
+            ):
+                return
+            break
+
+    await flask_application(scope, receive, send)
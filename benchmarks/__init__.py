@@ -0,0 +1 @@
+"""Benchmark harness for the read endpoints; run with `python -m benchmarks.run`."""
@@ -0,0 +1,329 @@
+"""
+Benchmark the read endpoints against synthetic data.
+
+Seeds a database (a local mongod, or mongomock with --mongomock), drives the
+Flask test client through each endpoint as a sample of users, and writes
+latency percentiles, database commands per request and allocation peaks as
+JSON. Pass --compare with an earlier result file to flag regressions.
+
+    python -m benchmarks.run --users 10000 --output before.json
+    python -m benchmarks.run --users 10000 --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from pymongo import monitoring
+
+# Keep benchmark data away from the development database, and write
+# notifications inline so seeded state is visible immediately
+os.environ.setdefault("MONGO_DB_NAME", "travel_match_bench")
+os.environ.setdefault("NOTIFICATIONS_SYNC", "true")
+# Indexes are created after seeding, which makes the bulk inserts faster
+os.environ.setdefault("ENSURE_INDEXES", "false")
+
+# pylint: disable=wrong-import-position
+import models.db as db_module
+from .seed import DESTINATIONS, seed
+
+# Commands that are not issued by application code
+IGNORED_COMMANDS = frozenset(
+    {"hello", "ismaster", "isMaster", "ping", "endSessions", "saslStart", "saslContinue"}
+)
+
+# mongomock methods counted as one command each
+MONGOMOCK_METHODS = (
+    "find",
+    "find_one",
+    "find_one_and_update",
+    "aggregate",
+    "count_documents",
+    "distinct",
+    "insert_one",
+    "insert_many",
+    "update_one",
+    "update_many",
+    "delete_one",
+    "delete_many",
+    "bulk_write",
+)
+
+ENDPOINTS = {
+    "matches": ("GET", "/api/matches", None),
+    "search": (
+        "POST",
+        "/api/matches/search",
+        lambda rng: {"destination": rng.choice(DESTINATIONS)},
+    ),
+    "conversations": ("GET", "/api/messages", None),
+    "bookmarks": ("GET", "/api/bookmarks", None),
+    "notifications": ("GET", "/api/notifications", None),
+}
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands sent to MongoDB."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, amount=1):
+        """Count commands issued outside pymongo's monitoring."""
+        with self._lock:
+            self.count += amount
+
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self.add()
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def count_mongomock_calls(counter):
+    """
+    mongomock does not publish command events, so count calls to its
+    collection methods instead. Calls made by other counted methods (find_one
+    calls find, for instance) are not counted twice.
+    """
+    import mongomock  # pylint: disable=import-outside-toplevel
+
+    local = threading.local()
+
+    def wrap(method):
+        def wrapper(*args, **kwargs):
+            depth = getattr(local, "depth", 0)
+            if depth == 0:
+                counter.add()
+            local.depth = depth + 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                local.depth = depth
+
+        return wrapper
+
+    for name in MONGOMOCK_METHODS:
+        setattr(mongomock.Collection, name, wrap(getattr(mongomock.Collection, name)))
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_clients(app, user_ids):
+    """Return one logged-in test client per user."""
+    clients = []
+    for user_id in user_ids:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["_user_id"] = str(user_id)
+            session["_fresh"] = True
+        clients.append(client)
+    return clients
+
+
+def benchmark_endpoint(clients, counter, method, path, body, requests, warmup, rng):
+    """Time one endpoint and return its summary."""
+    def call(client):
+        json_body = body(rng) if body else None
+        return client.open(path, method=method, json=json_body)
+
+    for index in range(warmup):
+        call(clients[index % len(clients)])
+
+    timings = []
+    errors = 0
+    commands_before = counter.count
+    for index in range(requests):
+        client = clients[index % len(clients)]
+        start = time.perf_counter()
+        response = call(client)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors += 1
+    commands = counter.count - commands_before
+
+    # Allocations are measured in a separate pass since tracing slows every call
+    peaks = []
+    tracemalloc.start()
+    try:
+        for index in range(min(requests, 50)):
+            client = clients[index % len(clients)]
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            call(client)
+            peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    peaks.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "max_ms": round(timings[-1], 3),
+        "commands_per_request": round(commands / requests, 2),
+        "alloc_peak_kib_p50": round(percentile(peaks, 0.50), 1),
+        "alloc_peak_kib_max": round(peaks[-1], 1),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print p95 latency and command count changes against a baseline and
+    return the endpoints where either grew by more than `threshold`.
+    """
+    regressions = []
+    print(f"{'endpoint':<15}{'p95 before':>12}{'p95 after':>12}{'change':>9}{'commands':>12}")
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        change = current["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0
+        commands = (
+            f"{previous['commands_per_request']:g}->{current['commands_per_request']:g}"
+        )
+        print(
+            f"{name:<15}{previous['p95_ms']:>12.2f}{current['p95_ms']:>12.2f}"
+            f"{change:>+9.0%}{commands:>12}"
+        )
+        if (
+            change > threshold
+            or current["commands_per_request"]
+            > previous["commands_per_request"] * (1 + threshold)
+        ):
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    """Seed the database, run the benchmarks and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--users", type=int, default=10000, help="number of users to seed")
+    parser.add_argument("--bookmarks-per-user", type=int, default=10)
+    parser.add_argument("--partners-per-user", type=int, default=5)
+    parser.add_argument("--messages-per-thread", type=int, default=20)
+    parser.add_argument("--notifications-per-user", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--sample-users", type=int, default=50, help="users to send requests as")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated list")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock instead of mongod")
+    parser.add_argument("--no-seed", action="store_true", help="reuse previously seeded data")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed p95 and command count growth, e.g. 0.2 for 20%%"
+    )
+    args = parser.parse_args(argv)
+
+    counter = CommandCounter()
+    if args.mongomock:
+        import mongomock  # pylint: disable=import-outside-toplevel
+
+        db_module.MongoClient = mongomock.MongoClient
+        count_mongomock_calls(counter)
+    else:
+        monitoring.register(counter)
+
+    from app import create_app  # pylint: disable=import-outside-toplevel
+    from models.indexes import ensure_indexes  # pylint: disable=import-outside-toplevel
+
+    app = create_app()
+    database = db_module.get_db()
+    started = time.perf_counter()
+    if args.no_seed:
+        user_ids = [user["_id"] for user in database.users.find({}, {"_id": 1})]
+        counts = {}
+    else:
+        user_ids, counts = seed(
+            database,
+            users=args.users,
+            bookmarks_per_user=args.bookmarks_per_user,
+            partners_per_user=args.partners_per_user,
+            messages_per_thread=args.messages_per_thread,
+            notifications_per_user=args.notifications_per_user,
+        )
+        if not args.mongomock:
+            ensure_indexes()
+    print(f"Seeded {counts or 'nothing'} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    rng = random.Random(0)
+    clients = make_clients(app, rng.sample(user_ids, min(args.sample_users, len(user_ids))))
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "backend": "mongomock" if args.mongomock else "mongod",
+            "scale": {
+                "users": args.users,
+                "bookmarks_per_user": args.bookmarks_per_user,
+                "partners_per_user": args.partners_per_user,
+                "messages_per_thread": args.messages_per_thread,
+                "notifications_per_user": args.notifications_per_user,
+            },
+            "counts": counts,
+        },
+        "results": {},
+    }
+    for name in args.endpoints.split(","):
+        method, path, body = ENDPOINTS[name]
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        results["results"][name] = benchmark_endpoint(
+            clients, counter, method, path, body, args.requests, args.warmup, rng
+        )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Synthetic data for the benchmarks: users, travel preferences, bookmarks,
+message threads with their conversation summaries, and notifications.
+"""
+import datetime
+import random
+from bson import ObjectId
+
+DESTINATIONS = (
+    "Paris", "Tokyo", "New York", "Lisbon", "Bangkok", "Mexico City",
+    "Cape Town", "Reykjavik", "Sydney", "Buenos Aires", "Rome", "Seoul",
+)
+BUDGETS = ("low", "medium", "high")
+TRAVEL_STYLES = ("adventure", "relaxation", "culture", "nightlife", "nature")
+ACCOMMODATION_TYPES = ("hostel", "hotel", "apartment", "camping")
+FOOD_PREFERENCES = ("vegetarian", "vegan", "halal", "kosher", "street food", "fine dining")
+
+# Documents per insert_many call
+BATCH_SIZE = 1000
+
+# Collections written by seed()
+COLLECTIONS = (
+    "users",
+    "travel_preferences",
+    "bookmarks",
+    "messages",
+    "conversations",
+    "notifications",
+    "notification_counters",
+)
+
+
+def _insert(collection, documents):
+    """Insert documents in batches and return how many were written."""
+    count = 0
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            count += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        count += len(batch)
+    return count
+
+
+def seed(
+    database,
+    users=10000,
+    bookmarks_per_user=10,
+    partners_per_user=5,
+    messages_per_thread=20,
+    notifications_per_user=30,
+    seed_value=42,
+):
+    """
+    Drop the benchmark collections and fill them with synthetic data.
+    Returns the list of user IDs and a dict of document counts.
+    """
+    rng = random.Random(seed_value)
+    for name in COLLECTIONS:
+        database.drop_collection(name)
+
+    now = datetime.datetime.now()
+    user_ids = [ObjectId() for _ in range(users)]
+    counts = {}
+
+    counts["users"] = _insert(
+        database.users,
+        (
+            {
+                "_id": user_id,
+                "name": f"Traveler {index}",
+                "email": f"traveler{index}@example.com",
+                "password_hash": "",
+                "profile_picture": "",
+                "created_at": now - datetime.timedelta(days=rng.randint(0, 365)),
+            }
+            for index, user_id in enumerate(user_ids)
+        ),
+    )
+
+    counts["travel_preferences"] = _insert(
+        database.travel_preferences,
+        (
+            {
+                "user_id": user_id,
+                "budget": rng.choice(BUDGETS),
+                "travel_style": rng.choice(TRAVEL_STYLES),
+                "arrival_time": "",
+                "food_preferences": rng.sample(FOOD_PREFERENCES, rng.randint(0, 3)),
+                "accommodation_type": rng.choice(ACCOMMODATION_TYPES),
+                "destination": rng.choice(DESTINATIONS),
+                "updated_at": now,
+            }
+            for user_id in user_ids
+        ),
+    )
+
+    def bookmarks():
+        for user_id in user_ids:
+            for other in rng.sample(user_ids, min(bookmarks_per_user, users - 1)):
+                if other != user_id:
+                    yield {"user_id": user_id, "bookmarked_user_id": other, "created_at": now}
+
+    counts["bookmarks"] = _insert(database.bookmarks, bookmarks())
+
+    # Each user starts threads with a few partners; pairs are deduplicated so
+    # the conversation summaries stay one per pair
+    pairs = set()
+    for user_id in user_ids:
+        for other in rng.sample(user_ids, min(partners_per_user, users - 1)):
+            if other != user_id:
+                pairs.add((min(user_id, other), max(user_id, other)))
+
+    conversations = []
+
+    def messages():
+        for low, high in pairs:
+            created_at = now - datetime.timedelta(minutes=messages_per_thread)
+            message = None
+            for index in range(messages_per_thread):
+                sender, recipient = (low, high) if index % 2 == 0 else (high, low)
+                created_at += datetime.timedelta(minutes=1)
+                message = {
+                    "sender_id": sender,
+                    "recipient_id": recipient,
+                    "content": f"Message {index} about {rng.choice(DESTINATIONS)}",
+                    "created_at": created_at,
+                }
+                yield message
+            if message is not None:
+                conversations.append(
+                    {
+                        "_id": f"{low}:{high}",
+                        "participants": [low, high],
+                        "last_message": {
+                            "content": message["content"],
+                            "sender_id": message["sender_id"],
+                            "created_at": message["created_at"],
+                        },
+                        "updated_at": message["created_at"],
+                        "unread": {str(message["recipient_id"]): 1},
+                    }
+                )
+
+    counts["messages"] = _insert(database.messages, messages())
+    counts["conversations"] = _insert(database.conversations, conversations)
+
+    counts["notifications"] = _insert(
+        database.notifications,
+        (
+            {
+                "user_id": user_id,
+                "type": "message",
+                "content": f"New message {index}",
+                "related_id": None,
+                "read": index % 3 != 0,
+                "created_at": now - datetime.timedelta(minutes=index),
+            }
+            for user_id in user_ids
+            for index in range(notifications_per_user)
+        ),
+    )
+
+    return user_ids, counts
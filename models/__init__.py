@@ -5,3 +5,5 @@ from .preferences import TravelPreference
 from .bookmark import Bookmark
 from .message import Message
 from .notifications import Notification
+from .deletion import DeletionJob
+from .profile import PublicProfile
@@ -0,0 +1,40 @@
+"""Async MongoDB access for the ASGI serving mode, using motor."""
+
+import logging
+import os
+from .db import DATABASE_NAME, client_options, command_listeners
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_async_client():
+    """
+    Return the shared motor client, creating it on first use. It is bound to
+    the event loop it is first used on, so there is one per server process.
+    """
+    global _client
+    if _client is None:
+        # Imported here so the WSGI app does not pay for motor and asyncio
+        try:
+            from motor.motor_asyncio import (  # pylint: disable=import-outside-toplevel
+                AsyncIOMotorClient,
+            )
+        except ImportError as e:
+            raise RuntimeError(
+                "The ASGI serving mode needs motor: pip install -r requirements-async.txt"
+            ) from e
+        mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+        # Command listeners see motor's commands in the context of the
+        # coroutine that awaited them, so per-request counts still work
+        _client = AsyncIOMotorClient(
+            mongo_uri, event_listeners=command_listeners(), **client_options()
+        )
+        logger.info("Created async MongoDB client")
+    return _client
+
+
+def get_async_db():
+    """Return the application database on the async client."""
+    return get_async_client()[DATABASE_NAME]
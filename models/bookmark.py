@@ -2,8 +2,25 @@
 Bookmark model for managing user bookmarks.
 """
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from .db import db
 
+# Default and maximum number of bookmarks returned per page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Fields of bookmarked users and their preferences included in results
+BOOKMARK_USER_PROJECTION = {"name": 1, "profile_picture": 1}
+BOOKMARK_PREFERENCE_PROJECTION = {
+    "user_id": 1,
+    "destination": 1,
+    "budget": 1,
+    "travel_style": 1,
+    "food_preferences": 1,
+    "accommodation_type": 1,
+    "arrival_time": 1,
+}
+
 
 class Bookmark:
     """
@@ -14,32 +31,121 @@ class Bookmark:
     def add(user_id, bookmarked_user_id):
         """
         Add a bookmark for a user.
+        Returns None if the user is already bookmarked.
         """
         bookmark = {
             "user_id": ObjectId(user_id),
             "bookmarked_user_id": ObjectId(bookmarked_user_id),
         }
-        db.bookmarks.insert_one(bookmark)
+        try:
+            db.bookmarks.insert_one(bookmark)
+        except DuplicateKeyError:
+            return None
         return bookmark
 
     @staticmethod
     def remove(user_id, bookmarked_user_id):
         """
-        Remove bookmark.
+        Remove bookmark. Returns True if a bookmark was removed.
         """
-        db.bookmarks.delete_one(
+        result = db.bookmarks.delete_one(
             {
                 "user_id": ObjectId(user_id),
                 "bookmarked_user_id": ObjectId(bookmarked_user_id),
             }
         )
+        return result.deleted_count > 0
+
+    @staticmethod
+    def get_version(user_id):
+        """
+        Get a (count, newest bookmark ID) pair that changes whenever a user's
+        bookmarks are added or removed.
+        """
+        summary = list(
+            db.bookmarks.aggregate(
+                [
+                    {"$match": {"user_id": ObjectId(user_id)}},
+                    {
+                        "$group": {
+                            "_id": None,
+                            "count": {"$sum": 1},
+                            "last": {"$max": "$_id"},
+                        }
+                    },
+                ]
+            )
+        )
+        return (summary[0]["count"], summary[0]["last"]) if summary else (0, None)
 
     @staticmethod
-    def get_by_user(user_id):
+    def get_by_user(user_id, limit=None, page_token=None):
         """
-        Find user boomarks by ID.
+        Find a page of user bookmarks, oldest first, joined with the bookmarked
+        users' preferences. Uses three queries regardless of the page size.
+        Returns a (bookmarks, next_page_token) tuple; raises ValueError if the
+        page token is malformed.
         """
-        bookmarks = db.bookmarks.find({"user_id": ObjectId(user_id)})
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        query = {"user_id": ObjectId(user_id)}
+        if page_token:
+            if not ObjectId.is_valid(page_token):
+                raise ValueError(f"Invalid page token: {page_token}")
+            query["_id"] = {"$gt": ObjectId(page_token)}
+
+        bookmarks = list(
+            db.bookmarks.find(query, {"bookmarked_user_id": 1})
+            .sort("_id", 1)
+            .limit(limit + 1)
+        )
+        next_page_token = None
+        if len(bookmarks) > limit:
+            bookmarks = bookmarks[:limit]
+            next_page_token = str(bookmarks[-1]["_id"])
+
         bookmarked_user_ids = [b["bookmarked_user_id"] for b in bookmarks]
-        users = db.users.find({"_id": {"$in": bookmarked_user_ids}})
-        return list(users)
+        if not bookmarked_user_ids:
+            return [], next_page_token
+
+        users = {
+            user["_id"]: user
+            for user in db.users.find(
+                {"_id": {"$in": bookmarked_user_ids}, "deleted_at": {"$exists": False}},
+                BOOKMARK_USER_PROJECTION,
+            )
+        }
+        preferences = {
+            pref["user_id"]: pref
+            for pref in db.travel_preferences.find(
+                {"user_id": {"$in": bookmarked_user_ids}},
+                BOOKMARK_PREFERENCE_PROJECTION,
+            )
+        }
+
+        result = []
+        for bookmarked_user_id in bookmarked_user_ids:
+            user = users.get(bookmarked_user_id)
+            if not user:
+                continue
+            preference = preferences.get(bookmarked_user_id)
+            result.append(
+                {
+                    "user": {
+                        "id": str(user["_id"]),
+                        "name": user.get("name", ""),
+                        "profile_picture": user.get("profile_picture", ""),
+                        "preferences": {
+                            "destination": preference.get("destination"),
+                            "budget": preference.get("budget"),
+                            "travel_style": preference.get("travel_style"),
+                            "food_preferences": preference.get("food_preferences"),
+                            "accommodation_type": preference.get("accommodation_type"),
+                            "arrival_time": preference.get("arrival_time"),
+                        }
+                        if preference
+                        else None,
+                    }
+                }
+            )
+
+        return result, next_page_token
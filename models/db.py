@@ -1,15 +1,217 @@
 """Module to connnect with MongoDB database."""
 
+import logging
 import os
-from pymongo import MongoClient
+import threading
+from pymongo import MongoClient, ReadPreference, monitoring
 from dotenv import load_dotenv
 
 load_dotenv()
 
-try:
-    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
-    client = MongoClient(mongo_uri)
-    db = client.travel_match_db
-    print("Connected to MongoDB!")
-except ConnectionError as e:
-    print("Failed to connect to MongoDB:", e)
+logger = logging.getLogger(__name__)
+
+DATABASE_NAME = os.getenv("MONGO_DB_NAME", "travel_match_db")
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Counts connection pool events so pool pressure can be monitored."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+            "pool_clears": 0,
+        }
+
+    def _incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def reset(self):
+        """Zero the counters, e.g. in a freshly forked worker."""
+        with self._lock:
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def snapshot(self):
+        """Return a copy of the current counters."""
+        with self._lock:
+            return dict(self.counters)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._incr("checkout_failures")
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.counters["checkouts"] += 1
+            self.counters["checked_out"] += 1
+
+    def connection_checked_in(self, event):
+        self._incr("checked_out", -1)
+
+
+pool_metrics = PoolMetrics()
+
+# Monitoring listeners passed to the client when it is created
+_event_listeners = [pool_metrics]
+
+_client = None
+_client_lock = threading.Lock()
+_databases = {}
+
+
+def client_options():
+    """
+    Build the MongoClient options from the environment. These take
+    precedence over the same options given in MONGO_URI.
+    """
+    options = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+        "serverSelectionTimeoutMS": int(
+            os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+        ),
+    }
+    # e.g. "zstd,snappy,zlib"; zstd and snappy need their optional packages
+    compressors = os.getenv("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def get_client():
+    """Return the shared MongoClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+                _client = MongoClient(
+                    mongo_uri, event_listeners=list(_event_listeners), **client_options()
+                )
+                logger.info("Created MongoDB client")
+    return _client
+
+
+def reset_client():
+    """
+    Forget the shared client so the next use creates a new one. Call this in
+    each worker after a fork: a MongoClient must not be used across fork, and
+    the child's copy of the parent's connections is unusable.
+    """
+    global _client
+    with _client_lock:
+        _client = None
+        _databases.clear()
+        pool_metrics.reset()
+
+
+def ping():
+    """Round-trip to the server through the connection pool; raises on failure."""
+    get_client().admin.command("ping")
+
+
+def add_event_listener(listener):
+    """
+    Attach a pymongo monitoring listener to the shared client. Listeners are
+    only picked up by a client created afterwards, so register them before
+    the database is first used.
+    """
+    if listener in _event_listeners:
+        return
+    _event_listeners.append(listener)
+    if _client is not None:
+        logger.warning("%s registered after the MongoDB client was created", listener)
+
+
+def command_listeners():
+    """Return the registered listeners that monitor commands, for other clients."""
+    return [
+        listener for listener in _event_listeners
+        if isinstance(listener, monitoring.CommandListener)
+    ]
+
+
+def get_db():
+    """Return the application database."""
+    database = _databases.get("primary")
+    if database is None:
+        database = _databases["primary"] = get_client()[DATABASE_NAME]
+    return database
+
+
+def get_read_db():
+    """
+    Return the application database configured for reads that tolerate
+    slightly stale data, such as search, so they can be served by
+    secondaries. Uses MONGO_READ_PREFERENCE (default secondaryPreferred).
+    """
+    database = _databases.get("read")
+    if database is None:
+        mode = os.getenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+        database = _databases["read"] = get_client().get_database(
+            DATABASE_NAME, read_preference=READ_PREFERENCES[mode]
+        )
+    return database
+
+
+def pool_stats():
+    """Return the connection pool counters and configured limits."""
+    stats = pool_metrics.snapshot()
+    stats["max_pool_size"] = client_options()["maxPoolSize"]
+    return stats
+
+
+class _LazyDatabase:
+    """Database handle that only connects when a collection is first used."""
+
+    def __init__(self, factory):
+        self._factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __getitem__(self, name):
+        return self._factory()[name]
+
+
+db = _LazyDatabase(get_db)
+read_db = _LazyDatabase(get_read_db)
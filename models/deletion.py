@@ -0,0 +1,231 @@
+"""
+Deletion job model for purging a deleted account's data in the background.
+"""
+import datetime
+import hashlib
+import logging
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from pymongo import DeleteMany
+from pymongo.errors import PyMongoError
+from .db import db, get_client
+from .notifications import notification_writer
+
+logger = logging.getLogger(__name__)
+
+# Number of documents deleted per batch
+DELETION_CHUNK_SIZE = int(os.getenv("DELETION_CHUNK_SIZE", "1000"))
+
+# Run each batch in a transaction when the deployment supports it
+DELETION_USE_TRANSACTIONS = (
+    os.getenv("DELETION_USE_TRANSACTIONS", "false").lower() == "true"
+)
+
+# (collection, field) pairs purged in order; the user document goes last
+PURGE_STEPS = [
+    ("travel_preferences", "user_id"),
+    ("bookmarks", "user_id"),
+    ("bookmarks", "bookmarked_user_id"),
+    ("notifications", "user_id"),
+    ("notification_counters", "_id"),
+    ("conversations", "participants"),
+    ("messages", "sender_id"),
+    ("messages", "recipient_id"),
+    ("users", "_id"),
+]
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _submit(job_id):
+    """Run a job on the background worker, starting it in this process if needed."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deletion")
+            _executor_pid = os.getpid()
+        _executor.submit(DeletionJob.run, job_id)
+
+
+def _token_hash(token):
+    """Hash a status token; only the hash is stored."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _tombstone_email(user_id):
+    """Placeholder email of a deleted user, freeing theirs for a new account."""
+    return f"deleted:{user_id}"
+
+
+def _supports_transactions():
+    """Check whether the deployment is a replica set or sharded cluster."""
+    hello = get_client().admin.command("hello")
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+
+class DeletionJob:
+    """
+    Provides methods for starting, running and tracking account deletions.
+    Starting a deletion tombstones the user right away; their data is then
+    purged in batches by a background worker, which records its progress in
+    the deletion_jobs collection so interrupted jobs can be resumed.
+    """
+    @staticmethod
+    def start(user_id):
+        """
+        Tombstone a user and queue the purge of their data. The user's email
+        is released right away so it can be registered again even if the
+        purge fails. Returns the job, with a "token" that the status can be
+        looked up with, or None if the user does not exist or is already
+        being deleted.
+        """
+        now = datetime.datetime.now()
+        result = db.users.update_one(
+            {"_id": ObjectId(user_id), "deleted_at": {"$exists": False}},
+            {"$set": {"deleted_at": now, "email": _tombstone_email(user_id)}},
+        )
+        if result.modified_count == 0:
+            return None
+
+        # The user is logged out once deletion starts, so the status is
+        # looked up with an unguessable token rather than the job ID
+        token = secrets.token_urlsafe(32)
+        job = {
+            "_id": ObjectId(),
+            "user_id": ObjectId(user_id),
+            "token_hash": _token_hash(token),
+            "status": "pending",
+            "deleted": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+        db.deletion_jobs.insert_one(job)
+        _submit(job["_id"])
+        job["token"] = token
+        return job
+
+    @staticmethod
+    def get_status(token):
+        """
+        Get the status and per-collection deleted counts of the job a token
+        was issued for, or None.
+        """
+        return db.deletion_jobs.find_one(
+            {"token_hash": _token_hash(token)},
+            {"status": 1, "deleted": 1, "created_at": 1, "updated_at": 1},
+        )
+
+    @staticmethod
+    def release_emails():
+        """
+        Give users tombstoned before emails were released on deletion their
+        placeholder email. Returns the number of users updated.
+        """
+        users = db.users.find(
+            {"deleted_at": {"$exists": True}, "email": {"$not": {"$regex": "^deleted:"}}},
+            {"_id": 1},
+        )
+        released = 0
+        for user in users:
+            db.users.update_one(
+                {"_id": user["_id"]}, {"$set": {"email": _tombstone_email(user["_id"])}}
+            )
+            released += 1
+        return released
+
+    @staticmethod
+    def _purge_chunk(collection, field, user_id, job_id, session=None):
+        """
+        Delete one batch of a user's documents from a collection and record
+        the progress. Returns the number of documents deleted.
+        """
+        ids = [
+            doc["_id"]
+            for doc in db[collection].find(
+                {field: user_id}, {"_id": 1}, session=session
+            ).limit(DELETION_CHUNK_SIZE)
+        ]
+        if not ids:
+            return 0
+
+        result = db[collection].bulk_write(
+            [DeleteMany({"_id": {"$in": ids}})], session=session
+        )
+        db.deletion_jobs.update_one(
+            {"_id": job_id},
+            {
+                "$inc": {f"deleted.{collection}": result.deleted_count},
+                "$set": {"updated_at": datetime.datetime.now()},
+            },
+            session=session,
+        )
+        return len(ids)
+
+    @staticmethod
+    def run(job_id):
+        """
+        Purge all data of the job's user in batches. Safe to rerun: each step
+        only deletes what is left.
+        """
+        job = db.deletion_jobs.find_one_and_update(
+            {"_id": job_id, "status": {"$in": ["pending", "running"]}},
+            {"$set": {"status": "running", "updated_at": datetime.datetime.now()}},
+        )
+        if not job:
+            return
+
+        # Make sure queued notifications for the user are written before purging
+        notification_writer.flush()
+
+        try:
+            use_transactions = DELETION_USE_TRANSACTIONS and _supports_transactions()
+            for collection, field in PURGE_STEPS:
+                while True:
+                    if use_transactions:
+                        with get_client().start_session() as session:
+                            purged = session.with_transaction(
+                                lambda s, c=collection, f=field: DeletionJob._purge_chunk(
+                                    c, f, job["user_id"], job_id, s
+                                )
+                            )
+                    else:
+                        purged = DeletionJob._purge_chunk(
+                            collection, field, job["user_id"], job_id
+                        )
+                    if purged < DELETION_CHUNK_SIZE:
+                        break
+        except PyMongoError:
+            logger.exception("Deletion job %s failed", job_id)
+            db.deletion_jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "updated_at": datetime.datetime.now()}},
+            )
+            return
+
+        db.deletion_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "done", "updated_at": datetime.datetime.now()}},
+        )
+
+    @staticmethod
+    def resume_pending():
+        """
+        Queue every job left pending, running or failed, e.g. by a restart.
+        Returns the number of jobs queued.
+        """
+        jobs = list(
+            db.deletion_jobs.find(
+                {"status": {"$in": ["pending", "running", "failed"]}}, {"_id": 1}
+            )
+        )
+        for job in jobs:
+            db.deletion_jobs.update_one(
+                {"_id": job["_id"], "status": "failed"}, {"$set": {"status": "pending"}}
+            )
+            _submit(job["_id"])
+        return len(jobs)
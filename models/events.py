@@ -0,0 +1,206 @@
+"""
+In-process publish/subscribe channel for realtime delivery of user events.
+"""
+import asyncio
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+# The low bits of every event ID identify the process that issued it
+EPOCH_BITS = 10
+
+
+class EventBus:
+    """
+    Keeps a bounded backlog of recent events per user and wakes the user's
+    waiting subscribers when a new event is published. Event IDs increase
+    monotonically, so clients can resume from the last ID they have seen.
+    Each process tags its IDs with a random epoch; a client resuming from
+    an ID issued by another process, or by an earlier run, gets a resync.
+
+    State of users with nobody waiting and no events for `idle_timeout`
+    seconds is dropped; a client that comes back after that gets a resync.
+
+    Events are only visible to subscribers in the same process, so pages
+    also poll slowly in case an event was published by another worker. A
+    broker such as Redis pub/sub can stand in for this class by implementing
+    `publish`, `wait` and `wait_async` with the same signatures.
+    """
+    def __init__(self, backlog_size=100, idle_timeout=300):
+        self._lock = threading.Lock()
+        self._conditions = {}
+        # (event loop, asyncio.Event) pairs of the coroutines waiting per user
+        self._async_waiters = {}
+        self._backlogs = {}
+        self._backlog_size = backlog_size
+        self._evicted = {}
+        self._idle_timeout = idle_timeout
+        # Last publish or wait per user, and the number of waiting subscribers
+        self._active = {}
+        self._waiters = {}
+        self._pruned_at = time.monotonic()
+        self._start_epoch()
+        # Workers forked from a preloaded app must not share the epoch
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._start_epoch)
+
+    def _start_epoch(self):
+        """
+        Pick this process's epoch and start its IDs from the current time in
+        milliseconds, so they keep increasing across restarts and stay exact
+        as JavaScript numbers.
+        """
+        self._epoch = secrets.randbelow(1 << EPOCH_BITS)
+        self._first_id = (time.time_ns() // 1_000_000) << EPOCH_BITS | self._epoch
+        self._last_id = self._first_id
+        # Newest event ID dropped along with an idle user's backlog
+        self._pruned_id = self._first_id
+
+    def _touch(self, user_id):
+        """
+        Record activity for a user. A user seen for the first time, or again
+        after being pruned, may have missed pruned events, so clients older
+        than those get a resync. Must be called with the lock held.
+        """
+        if user_id not in self._active and self._pruned_id > self._first_id:
+            self._evicted.setdefault(user_id, self._pruned_id)
+        self._active[user_id] = time.monotonic()
+        self._prune()
+
+    def _prune(self):
+        """
+        Drop the state of users that have been idle for idle_timeout with
+        nobody waiting. Runs at most every half idle_timeout. Must be called
+        with the lock held.
+        """
+        now = time.monotonic()
+        if now - self._pruned_at < self._idle_timeout / 2:
+            return
+        self._pruned_at = now
+        for user_id, active_at in list(self._active.items()):
+            if self._waiters.get(user_id) or now - active_at < self._idle_timeout:
+                continue
+            del self._active[user_id]
+            self._conditions.pop(user_id, None)
+            self._evicted.pop(user_id, None)
+            backlog = self._backlogs.pop(user_id, None)
+            if backlog:
+                self._pruned_id = max(self._pruned_id, backlog[-1]["id"])
+
+    def _condition(self, user_id):
+        """Return the condition variable for a user, creating it if needed."""
+        condition = self._conditions.get(user_id)
+        if condition is None:
+            condition = threading.Condition(self._lock)
+            self._conditions[user_id] = condition
+        return condition
+
+    def publish(self, user_id, event_type, data):
+        """
+        Publish an event to a user and wake up their waiting subscribers.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            self._touch(user_id)
+            self._last_id += 1 << EPOCH_BITS
+            event = {"id": self._last_id, "type": event_type, "data": data}
+            backlog = self._backlogs.get(user_id)
+            if backlog is None:
+                backlog = deque(maxlen=self._backlog_size)
+                self._backlogs[user_id] = backlog
+            if len(backlog) == backlog.maxlen:
+                self._evicted[user_id] = backlog[0]["id"]
+            backlog.append(event)
+            self._condition(user_id).notify_all()
+            for loop, waiter in self._async_waiters.get(user_id, ()):
+                loop.call_soon_threadsafe(waiter.set)
+        return event
+
+    def _events_since(self, user_id, last_id):
+        """
+        Return the backlog events newer than last_id. If events after last_id
+        may have been lost (evicted from the backlog, or published before this
+        process started), or last_id was issued by another process, a single
+        "resync" event is returned instead so the client knows to refetch its
+        state. Must be called with the lock held.
+        """
+        foreign = (
+            last_id % (1 << EPOCH_BITS) != self._epoch or last_id > self._last_id
+        )
+        if foreign or last_id < self._evicted.get(user_id, self._first_id):
+            return [{"id": self._last_id, "type": "resync", "data": None}]
+        backlog = self._backlogs.get(user_id, ())
+        return [event for event in backlog if event["id"] > last_id]
+
+    def wait(self, user_id, last_id=0, timeout=25.0):
+        """
+        Block until there are events newer than last_id for a user or the
+        timeout expires. Returns the list of new events (possibly empty).
+        """
+        user_id = str(user_id)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._touch(user_id)
+            condition = self._condition(user_id)
+            self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+            try:
+                while True:
+                    events = self._events_since(user_id, last_id)
+                    remaining = deadline - time.monotonic()
+                    if events or remaining <= 0:
+                        return events
+                    condition.wait(remaining)
+            finally:
+                self._leave(user_id)
+
+    async def wait_async(self, user_id, last_id=0, timeout=25.0):
+        """
+        Same as `wait`, for coroutines: waits on the event loop instead of
+        blocking a thread. Events may be published from any thread.
+        """
+        user_id = str(user_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiter = asyncio.Event()
+        with self._lock:
+            self._touch(user_id)
+            self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+            self._async_waiters.setdefault(user_id, set()).add((loop, waiter))
+        try:
+            while True:
+                with self._lock:
+                    events = self._events_since(user_id, last_id)
+                    # Events published from now on set the waiter again
+                    waiter.clear()
+                remaining = deadline - loop.time()
+                if events or remaining <= 0:
+                    return events
+                try:
+                    await asyncio.wait_for(waiter.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                waiters = self._async_waiters[user_id]
+                waiters.discard((loop, waiter))
+                if not waiters:
+                    del self._async_waiters[user_id]
+                self._leave(user_id)
+
+    def _leave(self, user_id):
+        """Record that a subscriber stopped waiting. Must be called with the lock held."""
+        self._waiters[user_id] -= 1
+        if not self._waiters[user_id]:
+            del self._waiters[user_id]
+        # Idle time counts from when the last subscriber left
+        self._active[user_id] = time.monotonic()
+
+    def last_event_id(self):
+        """Return the ID of the most recently published event."""
+        with self._lock:
+            return self._last_id
+
+
+event_bus = EventBus()
@@ -0,0 +1,238 @@
+"""
+Index declarations for every collection the models query, with helpers to
+create them idempotently and report missing or unused indexes.
+
+Run `python -m models.indexes` to create the indexes,
+`python -m models.indexes --check` to only report on them, or
+`python -m models.indexes --duplicates` to list documents that prevent a
+unique index from being created.
+"""
+import logging
+import os
+import sys
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from .db import db
+
+logger = logging.getLogger(__name__)
+
+# Set once every declared index is known to exist
+_indexes_verified = False
+# Set once the server rejects an index build, e.g. because of duplicates,
+# which retrying cannot fix
+_creation_failed = False
+
+# Notifications are deleted by a TTL index this long after they were read.
+# Changing it requires updating the existing index with collMod (or dropping
+# it first).
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "travel_preferences": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "bookmarks": [
+        IndexModel(
+            [("user_id", ASCENDING), ("bookmarked_user_id", ASCENDING)],
+            name="user_bookmark_unique",
+            unique=True,
+        ),
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_id"),
+        IndexModel([("bookmarked_user_id", ASCENDING)], name="bookmarked_user_id"),
+    ],
+    "messages": [
+        IndexModel(
+            [
+                ("sender_id", ASCENDING),
+                ("recipient_id", ASCENDING),
+                ("created_at", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="conversation_created_at",
+        ),
+        IndexModel([("recipient_id", ASCENDING)], name="recipient_id"),
+    ],
+    "conversations": [
+        IndexModel(
+            [("participants", ASCENDING), ("updated_at", DESCENDING)],
+            name="participants_updated_at",
+        ),
+    ],
+    "deletion_jobs": [
+        IndexModel([("token_hash", ASCENDING)], name="token_hash"),
+    ],
+    "notifications": [
+        IndexModel(
+            [("user_id", ASCENDING), ("read", ASCENDING), ("created_at", DESCENDING)],
+            name="user_read_created_at",
+        ),
+        IndexModel([("user_id", ASCENDING), ("_id", DESCENDING)], name="user_id_id"),
+        # Unread notifications have no read_at, so the TTL skips them
+        IndexModel(
+            [("read_at", ASCENDING)],
+            name="read_at_ttl",
+            expireAfterSeconds=NOTIFICATION_RETENTION_DAYS * 24 * 60 * 60,
+        ),
+    ],
+}
+
+# Indexes from earlier releases that ensure_indexes drops
+RETIRED_INDEXES = {
+    # Counted retention from creation, deleting old notifications once read
+    "notifications": ["read_created_at_ttl"],
+}
+
+
+def ensure_indexes(database=None):
+    """
+    Create every declared index that does not exist yet, and drop retired
+    ones. Returns a dict mapping collection names to the index names ensured.
+    """
+    database = database if database is not None else db
+    for collection, names in RETIRED_INDEXES.items():
+        existing = database[collection].index_information()
+        for name in names:
+            if name in existing:
+                database[collection].drop_index(name)
+    ensured = {}
+    for collection, indexes in INDEXES.items():
+        ensured[collection] = database[collection].create_indexes(indexes)
+    return ensured
+
+
+def missing_indexes(database=None):
+    """Return a dict mapping collection names to their missing declared indexes."""
+    database = database if database is not None else db
+    missing = {}
+    for collection, indexes in INDEXES.items():
+        existing = set(database[collection].index_information())
+        names = sorted(
+            index.document["name"]
+            for index in indexes
+            if index.document["name"] not in existing
+        )
+        if names:
+            missing[collection] = names
+    return missing
+
+
+def indexes_ready(create=False):
+    """
+    Check that every declared index exists, first creating missing ones when
+    `create` is set. The unique indexes are what reject duplicate accounts
+    and bookmarks, so the app is not ready without them. A positive answer
+    is remembered for the life of the process.
+
+    Creation is not attempted again after the server has rejected it; the
+    indexes must then be created with `flask ensure-indexes` once the cause
+    is fixed. Connection errors propagate and leave creation to be retried.
+    """
+    global _indexes_verified, _creation_failed
+    if not _indexes_verified:
+        if create and not _creation_failed:
+            try:
+                ensure_indexes()
+            except OperationFailure as e:
+                # Usually duplicates blocking a unique index; see --duplicates
+                _creation_failed = True
+                logger.error("Could not create the MongoDB indexes: %s", e)
+        _indexes_verified = not missing_indexes()
+    return _indexes_verified
+
+
+def find_duplicates(database=None):
+    """
+    Find documents that share the keys of a unique index, which makes
+    creating that index fail. Returns a dict mapping "collection.index"
+    names to a list of {"keys": ..., "ids": [...]} groups.
+    """
+    database = database if database is not None else db
+    duplicates = {}
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            if not index.document.get("unique"):
+                continue
+            fields = list(index.document["key"])
+            groups = database[collection].aggregate(
+                [
+                    {
+                        "$group": {
+                            "_id": {field: f"${field}" for field in fields},
+                            "ids": {"$push": "$_id"},
+                            "count": {"$sum": 1},
+                        }
+                    },
+                    {"$match": {"count": {"$gt": 1}}},
+                ],
+                allowDiskUse=True,
+            )
+            found = [{"keys": group["_id"], "ids": group["ids"]} for group in groups]
+            if found:
+                duplicates[f"{collection}.{index.document['name']}"] = found
+    return duplicates
+
+
+def index_report(database=None):
+    """
+    Compare the declared indexes against those in the database.
+    Returns a dict mapping collection names to their "missing" declared
+    indexes, "undeclared" existing indexes and "unused" indexes that have
+    not served a query since the server started (None when index usage
+    statistics are not available).
+    """
+    database = database if database is not None else db
+    report = {}
+    for collection, indexes in INDEXES.items():
+        declared = {index.document["name"] for index in indexes}
+        existing = set(database[collection].index_information()) - {"_id_"}
+
+        try:
+            stats = database[collection].aggregate([{"$indexStats": {}}])
+            unused = sorted(
+                stat["name"]
+                for stat in stats
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+            )
+        except OperationFailure:
+            unused = None
+
+        report[collection] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": unused,
+        }
+    return report
+
+
+def main(argv=None):
+    """
+    Create the declared indexes, only report on them with --check, or list
+    duplicates blocking the unique indexes with --duplicates.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if "--duplicates" in argv:
+        duplicates = find_duplicates()
+        for name, groups in duplicates.items():
+            for group in groups:
+                ids = ", ".join(str(_id) for _id in group["ids"])
+                print(f"{name}: {group['keys']} shared by {ids}")
+        return 1 if duplicates else 0
+
+    if "--check" not in argv:
+        for collection, names in ensure_indexes().items():
+            print(f"{collection}: ensured {', '.join(names)}")
+
+    missing = False
+    for collection, status in index_report().items():
+        for key in ("missing", "undeclared", "unused"):
+            if status[key]:
+                print(f"{collection}: {key} {', '.join(status[key])}")
+        missing = missing or bool(status["missing"])
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
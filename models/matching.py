@@ -0,0 +1,221 @@
+"""
+In-memory matching engine for ranking travel partners by preference similarity.
+"""
+import heapq
+import threading
+import time
+from .db import db
+from .versions import PREFERENCES, bump_version, get_versions
+
+# Relative weight of each preference attribute in the similarity score
+MATCH_WEIGHTS = {
+    "destination": 3.0,
+    "budget": 2.0,
+    "travel_style": 2.0,
+    "accommodation_type": 1.0,
+    "food_preferences": 1.0,
+}
+
+# Preference fields kept in memory so matches can be rendered without a refetch
+PROFILE_FIELDS = (
+    "budget",
+    "travel_style",
+    "food_preferences",
+    "destination",
+    "accommodation_type",
+)
+
+
+def _normalize(value):
+    """Normalize an attribute value so that matching ignores case and spacing."""
+    return str(value).strip().lower()
+
+
+class MatchingEngine:
+    """
+    Keeps an inverted index from every preference attribute value to the users
+    holding it. Candidates are collected by looking up only the values the
+    user holds, and each candidate is scored by the weighted share of the
+    user's attributes it has in common, so partial matches still surface.
+
+    The index is loaded lazily from the travel_preferences collection. Every
+    change bumps a version counter stored in MongoDB; at most every
+    `check_interval` seconds the engine compares it with the version it
+    loaded and reloads when another process has changed preferences since.
+    The index is also reloaded after `max_age` seconds regardless.
+    """
+    def __init__(self, weights=None, max_age=300, check_interval=2):
+        self._weights = dict(weights or MATCH_WEIGHTS)
+        self._max_age = max_age
+        self._check_interval = check_interval
+        self._lock = threading.RLock()
+        # Held while loading so concurrent requests wait for one load
+        self._load_lock = threading.Lock()
+        self._index = {}
+        self._profiles = {}
+        self._loaded_at = None
+        self._checked_at = None
+        # Persisted version of the preferences the index reflects
+        self.version = 0
+
+    def _values(self, attribute, preference):
+        """Return the set of normalized values of an attribute in a preference."""
+        value = preference.get(attribute)
+        values = value if isinstance(value, list) else [value]
+        return {_normalize(v) for v in values if v not in (None, "")}
+
+    def _add(self, user_id, preference, index=None, profiles=None):
+        """
+        Index a preference document, into the engine's index unless another
+        one is given. Must be called with the lock held for the engine's.
+        """
+        index = self._index if index is None else index
+        profiles = self._profiles if profiles is None else profiles
+        profiles[user_id] = {field: preference.get(field) for field in PROFILE_FIELDS}
+        for attribute in self._weights:
+            for value in self._values(attribute, preference):
+                index[attribute].setdefault(value, set()).add(user_id)
+
+    def _discard(self, user_id):
+        """Remove a user from the index. Must be called with the lock held."""
+        profile = self._profiles.pop(user_id, None)
+        if profile is None:
+            return
+        for attribute in self._weights:
+            postings = self._index[attribute]
+            for value in self._values(attribute, profile):
+                users = postings.get(value)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del postings[value]
+
+    def load(self):
+        """
+        Rebuild the index from the travel_preferences collection. The new
+        index is built while lookups keep using the current one.
+        """
+        # Read the version first: a change made while loading then shows up
+        # as a newer version on the next check. The preferences are read
+        # from the primary too, as a lagging secondary could return data
+        # older than that version.
+        (version,) = get_versions(PREFERENCES)
+        projection = {field: 1 for field in PROFILE_FIELDS}
+        projection["user_id"] = 1
+        index = {attribute: {} for attribute in self._weights}
+        profiles = {}
+        for preference in db.travel_preferences.find({}, projection):
+            self._add(preference["user_id"], preference, index, profiles)
+
+        with self._lock:
+            self._index = index
+            self._profiles = profiles
+            self._loaded_at = self._checked_at = time.monotonic()
+            self.version = version
+
+    def _is_current(self):
+        """Check whether the loaded index still reflects the stored preferences."""
+        now = time.monotonic()
+        if self._loaded_at is None or now - self._loaded_at > self._max_age:
+            return False
+        if self._checked_at is not None and now - self._checked_at < self._check_interval:
+            return True
+        self._checked_at = now
+        return get_versions(PREFERENCES)[0] == self.version
+
+    def _ensure_loaded(self):
+        """Load the index if it has not been loaded yet or has gone stale."""
+        if self._is_current():
+            return
+        loaded_at = self._loaded_at
+        with self._load_lock:
+            # Another request may have reloaded it while this one waited
+            if self._loaded_at == loaded_at:
+                self.load()
+
+    def _changed(self, version):
+        """
+        Record the version a local change was stored as. If other changes
+        were stored in between, the next lookup checks and reloads.
+        Must be called with the lock held.
+        """
+        if version == self.version + 1:
+            self.version = version
+        else:
+            self._checked_at = None
+
+    def upsert(self, preference):
+        """Index a new or updated preference document."""
+        version = bump_version(PREFERENCES)
+        with self._lock:
+            if self._loaded_at is not None:
+                self._discard(preference["user_id"])
+                self._add(preference["user_id"], preference)
+            self._changed(version)
+
+    def remove(self, user_id):
+        """Remove a user's preferences from the index."""
+        version = bump_version(PREFERENCES)
+        with self._lock:
+            if self._loaded_at is not None:
+                self._discard(user_id)
+            self._changed(version)
+
+    def get_version(self):
+        """
+        Return the stored version of the preferences the index reflects,
+        which is the same in every process that is up to date. Loads the
+        index first if needed.
+        """
+        self._ensure_loaded()
+        return self.version
+
+    def get_profile(self, user_id):
+        """Return the indexed preference fields of a user, or None."""
+        with self._lock:
+            return self._profiles.get(user_id)
+
+    def find_matches(self, user_id, limit=50, after=None):
+        """
+        Return up to `limit` (user_id, score) pairs for the users most similar
+        to the given user. Scores range from 0 to 1 and results are ordered by
+        score, then user ID, so pages are stable. Pass the (user_id, score) of
+        the last result of a page as `after` to get the next page.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is None:
+                return []
+
+            scores = {}
+            total_weight = 0.0
+            for attribute, weight in self._weights.items():
+                values = self._values(attribute, profile)
+                if not values:
+                    continue
+                total_weight += weight
+                # Each shared value contributes an equal share of the weight
+                share = weight / len(values)
+                postings = self._index[attribute]
+                for value in values:
+                    for other_id in postings.get(value, ()):
+                        scores[other_id] = scores.get(other_id, 0.0) + share
+
+        scores.pop(user_id, None)
+        if not total_weight:
+            return []
+
+        candidates = (
+            ((-round(score / total_weight, 4), str(other_id)), other_id)
+            for other_id, score in scores.items()
+        )
+        if after is not None:
+            after_key = (-after[1], str(after[0]))
+            candidates = (item for item in candidates if item[0] > after_key)
+
+        top = heapq.nsmallest(limit, candidates, key=lambda item: item[0])
+        return [(other_id, -key[0]) for key, other_id in top]
+
+
+matching_engine = MatchingEngine()
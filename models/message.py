@@ -2,7 +2,62 @@
 
 import datetime
 from bson import ObjectId
+from .async_db import get_async_db
 from .db import db
+from .events import event_bus
+
+# Default and maximum number of messages returned per conversation page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# User fields shown next to each conversation
+CONVERSATION_USER_PROJECTION = {"name": 1, "profile_picture": 1}
+
+
+def _partners_query(partner_ids):
+    """Query matching the conversation partners that have not been deleted."""
+    return {"_id": {"$in": partner_ids}, "deleted_at": {"$exists": False}}
+
+
+def _conversation_key(user1_id, user2_id):
+    """Return the conversation summary key and ordered participant pair."""
+    pair = sorted([ObjectId(user1_id), ObjectId(user2_id)])
+    return f"{pair[0]}:{pair[1]}", pair
+
+
+def _partner_ids(user_id, summaries):
+    """Return the other participant of each conversation summary."""
+    return [
+        next((p for p in summary["participants"] if p != user_id), user_id)
+        for summary in summaries
+    ]
+
+
+def _format_conversations(user_id, summaries, partner_ids, users):
+    """Build the conversation list from summaries and their partners' user documents."""
+    users = {user["_id"]: user for user in users}
+    conversations = []
+    for summary, partner_id in zip(summaries, partner_ids):
+        other_user = users.get(partner_id)
+        if not other_user:
+            continue
+        last_message = summary.get("last_message", {})
+        conversations.append(
+            {
+                "user": {
+                    "id": str(other_user["_id"]),
+                    "name": other_user.get("name", ""),
+                    "profile_picture": other_user.get("profile_picture", ""),
+                },
+                "unread_count": summary.get("unread", {}).get(str(user_id), 0),
+                "last_message": {
+                    "content": last_message.get("content", ""),
+                    "timestamp": last_message.get("created_at"),
+                },
+            }
+        )
+
+    return conversations
 
 
 class Message:
@@ -15,15 +70,69 @@ class Message:
             "sender_id": ObjectId(sender_id),
             "recipient_id": ObjectId(recipient_id),
             "content": content,
+            "read": False,
             "created_at": datetime.datetime.now(),
         }
         db.messages.insert_one(message)
+
+        # Keep the conversation summary in step so the inbox never has to
+        # scan the messages collection.
+        key, pair = _conversation_key(sender_id, recipient_id)
+        db.conversations.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "participants": pair,
+                    "last_message": {
+                        "content": content,
+                        "sender_id": message["sender_id"],
+                        "created_at": message["created_at"],
+                    },
+                    "updated_at": message["created_at"],
+                },
+                "$inc": {f"unread.{message['recipient_id']}": 1},
+            },
+            upsert=True,
+        )
+
+        # Let both participants' open conversation views know about it
+        event = {
+            "id": str(message["_id"]),
+            "sender_id": str(message["sender_id"]),
+            "recipient_id": str(message["recipient_id"]),
+        }
+        event_bus.publish(message["recipient_id"], "message", event)
+        event_bus.publish(message["sender_id"], "message", event)
         return message
 
     @staticmethod
-    def get_conversation(user1_id, user2_id):
-        """Retrieve messages between two user IDs."""
-        messages = db.messages.find(
+    def encode_cursor(message):
+        """Encode the (created_at, _id) position of a message as a cursor string."""
+        return f"{message['created_at'].isoformat()}|{message['_id']}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode a cursor string into a (created_at, _id) tuple.
+        Raises ValueError if the cursor is malformed.
+        """
+        created_at, _, message_id = cursor.partition("|")
+        if not ObjectId.is_valid(message_id):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return datetime.datetime.fromisoformat(created_at), ObjectId(message_id)
+
+    @staticmethod
+    def get_conversation(user1_id, user2_id, before=None, after=None, limit=None):
+        """
+        Retrieve a page of messages between two user IDs in chronological order.
+
+        With `after`, returns the oldest messages newer than that cursor so a
+        poller only downloads what it has not seen yet. Otherwise returns the
+        newest messages older than `before` (or the newest overall).
+        Returns a (messages, has_more) tuple.
+        """
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        conditions = [
             {
                 "$or": [
                     {
@@ -36,41 +145,196 @@ class Message:
                     },
                 ]
             }
-        ).sort("created_at", 1)
-        return list(messages)
+        ]
 
-    @staticmethod
-    def get_conversations(user_id):
-        """Retrieve all messages sent and received by a specific user ID."""
-        sent_to = db.messages.distinct("recipient_id", {"sender_id": ObjectId(user_id)})
-        received_from = db.messages.distinct(
-            "sender_id", {"recipient_id": ObjectId(user_id)}
-        )
-        user_ids = list(set(sent_to + received_from))
-
-        conversations = []
-        for other_user_id in user_ids:
-            latest_message = db.messages.find_one(
+        if after:
+            created_at, message_id = Message.decode_cursor(after)
+            conditions.append(
                 {
                     "$or": [
-                        {"sender_id": ObjectId(user_id), "recipient_id": other_user_id},
-                        {"sender_id": other_user_id, "recipient_id": ObjectId(user_id)},
+                        {"created_at": {"$gt": created_at}},
+                        {"created_at": created_at, "_id": {"$gt": message_id}},
                     ]
-                },
-                sort=[("created_at", -1)],
+                }
             )
-
-            other_user = db.users.find_one({"_id": other_user_id})
-            if latest_message and other_user:
-                conversations.append(
+            direction = 1
+        else:
+            if before:
+                created_at, message_id = Message.decode_cursor(before)
+                conditions.append(
                     {
-                        "user": {
-                            "id": str(other_user["_id"]),
-                            "name": other_user["name"],
-                            "profile_picture": other_user.get("profile_picture", ""),
-                        },
-                        "latest_message": latest_message["content"],
+                        "$or": [
+                            {"created_at": {"$lt": created_at}},
+                            {"created_at": created_at, "_id": {"$lt": message_id}},
+                        ]
                     }
                 )
+            direction = -1
+
+        messages = list(
+            db.messages.find({"$and": conditions})
+            .sort([("created_at", direction), ("_id", direction)])
+            .limit(limit + 1)
+        )
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if direction == -1:
+            messages.reverse()
+        return messages, has_more
 
-        return conversations
+    @staticmethod
+    def get_conversation_updated_at(user1_id, user2_id):
+        """Get when the last message between two user IDs was sent, or None."""
+        key, _ = _conversation_key(user1_id, user2_id)
+        summary = db.conversations.find_one({"_id": key}, {"updated_at": 1})
+        return summary.get("updated_at") if summary else None
+
+    @staticmethod
+    def mark_conversation_read(user_id, other_user_id):
+        """
+        Reset the unread count of user ID for their conversation with another
+        user, and mark the messages they received in it as read. Nothing is
+        written when the conversation has no unread messages.
+        """
+        key, _ = _conversation_key(user_id, other_user_id)
+        unread_field = f"unread.{ObjectId(user_id)}"
+        result = db.conversations.update_one(
+            {"_id": key, unread_field: {"$gt": 0}}, {"$set": {unread_field: 0}}
+        )
+        if result.modified_count:
+            db.messages.update_many(
+                {
+                    "sender_id": ObjectId(other_user_id),
+                    "recipient_id": ObjectId(user_id),
+                    "read": False,
+                },
+                {"$set": {"read": True}},
+            )
+
+    @staticmethod
+    def get_conversations(user_id):
+        """
+        Retrieve the conversation summaries of a specific user ID, newest first.
+        Uses two queries regardless of how many conversation partners there are.
+        """
+        user_id = ObjectId(user_id)
+        summaries = list(
+            db.conversations.find({"participants": user_id}).sort("updated_at", -1)
+        )
+
+        partner_ids = _partner_ids(user_id, summaries)
+        users = list(
+            db.users.find(_partners_query(partner_ids), CONVERSATION_USER_PROJECTION)
+        )
+        return _format_conversations(user_id, summaries, partner_ids, users)
+
+    @staticmethod
+    async def get_conversations_async(user_id):
+        """
+        Same as `get_conversations`, using the async client. The partner
+        lookup depends on the summaries, so the two queries run in turn.
+        """
+        database = get_async_db()
+        user_id = ObjectId(user_id)
+        summaries = await (
+            database.conversations.find({"participants": user_id})
+            .sort("updated_at", -1)
+            .to_list(None)
+        )
+        partner_ids = _partner_ids(user_id, summaries)
+        users = await database.users.find(
+            _partners_query(partner_ids), CONVERSATION_USER_PROJECTION
+        ).to_list(None)
+        return _format_conversations(user_id, summaries, partner_ids, users)
+
+    @staticmethod
+    def rebuild_conversations():
+        """
+        Rebuild the conversation summaries from the messages collection in a
+        single aggregation. Used to backfill summaries for existing messages;
+        run by the "rebuild_conversations" migration. Each side's unread count
+        is the number of messages it received with `read: false`, so messages
+        sent before read state was recorded count as read.
+        """
+        db.messages.aggregate(
+            [
+                {"$sort": {"created_at": 1}},
+                {
+                    "$addFields": {
+                        "low": {"$min": ["$sender_id", "$recipient_id"]},
+                        "high": {"$max": ["$sender_id", "$recipient_id"]},
+                        "unread": {"$eq": ["$read", False]},
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": {"low": "$low", "high": "$high"},
+                        "content": {"$last": "$content"},
+                        "sender_id": {"$last": "$sender_id"},
+                        "created_at": {"$last": "$created_at"},
+                        "unread_low": {
+                            "$sum": {
+                                "$cond": [
+                                    {
+                                        "$and": [
+                                            "$unread",
+                                            {"$eq": ["$recipient_id", "$low"]},
+                                        ]
+                                    },
+                                    1,
+                                    0,
+                                ]
+                            }
+                        },
+                        "unread_high": {
+                            "$sum": {
+                                "$cond": [
+                                    {
+                                        "$and": [
+                                            "$unread",
+                                            {"$eq": ["$recipient_id", "$high"]},
+                                        ]
+                                    },
+                                    1,
+                                    0,
+                                ]
+                            }
+                        },
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": {
+                            "$concat": [
+                                {"$toString": "$_id.low"},
+                                ":",
+                                {"$toString": "$_id.high"},
+                            ]
+                        },
+                        "participants": ["$_id.low", "$_id.high"],
+                        "last_message": {
+                            "content": "$content",
+                            "sender_id": "$sender_id",
+                            "created_at": "$created_at",
+                        },
+                        "updated_at": "$created_at",
+                        "unread": {
+                            "$arrayToObject": [
+                                [
+                                    {"k": {"$toString": "$_id.low"}, "v": "$unread_low"},
+                                    {"k": {"$toString": "$_id.high"}, "v": "$unread_high"},
+                                ]
+                            ]
+                        },
+                    }
+                },
+                {
+                    "$merge": {
+                        "into": "conversations",
+                        "on": "_id",
+                        "whenMatched": "merge",
+                        "whenNotMatched": "insert",
+                    }
+                },
+            ]
+        )
@@ -0,0 +1,69 @@
+"""
+Data migrations that backfill documents for features that expect them.
+
+Each migration runs once per database and is recorded in the migrations
+collection. Run `flask migrate` (or `python -m models.migrations`) after
+deploying a release; `python -m models.migrations --check` lists pending
+migrations without running them.
+"""
+import datetime
+import logging
+import sys
+from .db import db
+from .deletion import DeletionJob
+from .message import Message
+from .notifications import Notification
+
+logger = logging.getLogger(__name__)
+
+# (name, function) pairs, run in order. Migrations must be safe to run again
+# in case one is interrupted before it is recorded.
+MIGRATIONS = [
+    # Conversation summaries for messages sent before they were maintained
+    ("rebuild_conversations", Message.rebuild_conversations),
+    # Start the retention period of notifications read before read_at existed
+    ("backfill_notification_read_at", Notification.backfill_read_at),
+    # Free the emails of accounts deleted before they were released
+    ("release_deleted_emails", DeletionJob.release_emails),
+]
+
+
+def pending_migrations(database=None):
+    """Return the names of the migrations not yet applied, in order."""
+    database = database if database is not None else db
+    applied = {doc["_id"] for doc in database.migrations.find({}, {"_id": 1})}
+    return [name for name, _ in MIGRATIONS if name not in applied]
+
+
+def run_migrations(database=None):
+    """Apply every pending migration. Returns the names of those applied."""
+    database = database if database is not None else db
+    pending = pending_migrations(database)
+    functions = dict(MIGRATIONS)
+    for name in pending:
+        logger.info("Running migration %s", name)
+        functions[name]()
+        database.migrations.update_one(
+            {"_id": name},
+            {"$set": {"applied_at": datetime.datetime.now()}},
+            upsert=True,
+        )
+    return pending
+
+
+def main(argv=None):
+    """Run the pending migrations, or only list them with --check."""
+    argv = sys.argv[1:] if argv is None else argv
+    if "--check" in argv:
+        pending = pending_migrations()
+        for name in pending:
+            print(f"pending: {name}")
+        return 1 if pending else 0
+
+    for name in run_migrations():
+        print(f"applied: {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
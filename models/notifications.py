@@ -1,9 +1,215 @@
 """
 Notification model for managing user and system notifications.
 """
+import atexit
 import datetime
+import logging
+import os
+import queue
+import threading
+import time
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from .db import db
+from .events import event_bus
+
+logger = logging.getLogger(__name__)
+
+# Default and maximum number of notifications returned per page
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Times recount_unread retries when the counter changes while it counts
+RECOUNT_ATTEMPTS = 3
+
+_STOP = object()
+
+
+class NotificationWriter:
+    """
+    Writes notifications from a background thread so request handlers do not
+    wait on the insert. Queued notifications are grouped into insert_many
+    batches of up to `batch_size`, waiting at most `flush_interval` seconds
+    for a batch to fill. When the queue is full the notification is written
+    inline instead of being dropped, and the queue is drained at exit.
+    Notifications that cannot be written are logged and counted in `dropped`.
+
+    With `synchronous` set (or NOTIFICATIONS_SYNC=true), notifications are
+    written inline, which keeps tests deterministic.
+    """
+    def __init__(self, batch_size=100, flush_interval=0.05, queue_size=10000,
+                 synchronous=False):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.synchronous = synchronous
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.dropped = 0
+
+    def _running(self):
+        """Whether this process's worker thread is alive."""
+        return (
+            self._thread is not None
+            and self._pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def _ensure_started(self):
+        """
+        Start the worker thread, restarting it in a forked child process or
+        if it died. A restarted worker keeps the notifications still queued.
+        """
+        if self._running():
+            return
+        with self._lock:
+            if not self._running():
+                if self._queue is None or self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.queue_size)
+                else:
+                    logger.error("Notification writer thread died; restarting it")
+                self._thread = threading.Thread(
+                    target=self._run, name="notification-writer", daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, notification):
+        """Queue a notification document for writing."""
+        if self.synchronous:
+            self._write([notification])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(notification)
+        except queue.Full:
+            self._write([notification])
+
+    def _run(self):
+        """Worker loop: collect notifications into batches and write them."""
+        work = self._queue
+        stopping = False
+        while not stopping:
+            item = work.get()
+            if item is _STOP:
+                work.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = work.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    work.task_done()
+                    break
+                batch.append(item)
+
+            try:
+                self._write(batch)
+            except Exception:  # pylint: disable=broad-except
+                # Keep the worker alive, or flush() and shutdown() would hang
+                self._drop(len(batch))
+            finally:
+                for _ in batch:
+                    work.task_done()
+
+    def _drop(self, count):
+        """Log and count notifications that could not be written."""
+        logger.exception("Failed to write %d notifications", count)
+        with self._lock:
+            self.dropped += count
+
+    def _insert(self, batch):
+        """Insert a batch of notifications and return those that were stored."""
+        try:
+            db.notifications.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Unordered inserts keep going past a failed document
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            self._drop(len(failed))
+            return [n for index, n in enumerate(batch) if index not in failed]
+        except Exception:  # pylint: disable=broad-except
+            # Includes documents bson cannot encode, not only server errors
+            self._drop(len(batch))
+            return []
+        return batch
+
+    @staticmethod
+    def _count_unread(batch):
+        """Add stored notifications to their users' unread counters."""
+        unread_counts = {}
+        for notification in batch:
+            user_id = notification["user_id"]
+            unread_counts[user_id] = unread_counts.get(user_id, 0) + 1
+
+        try:
+            db.notification_counters.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": user_id},
+                        {"$inc": {"unread": count, "version": count}},
+                    )
+                    for user_id, count in unread_counts.items()
+                ],
+                ordered=False,
+            )
+        except Exception:  # pylint: disable=broad-except
+            # The notifications are stored; drop the counters instead so they
+            # are recounted on next use rather than left short
+            logger.exception(
+                "Failed to update the unread counters of %d users", len(unread_counts)
+            )
+            try:
+                db.notification_counters.delete_many(
+                    {"_id": {"$in": list(unread_counts)}}
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Failed to reset the unread counters")
+
+    def _write(self, batch):
+        """Insert a batch of notifications and publish them to their users."""
+        batch = self._insert(batch)
+        if not batch:
+            return
+        self._count_unread(batch)
+
+        for notification in batch:
+            event_bus.publish(
+                notification["user_id"],
+                "notification",
+                {
+                    "id": str(notification["_id"]),
+                    "type": notification["type"],
+                    "content": notification["content"],
+                },
+            )
+
+    def flush(self):
+        """Block until every queued notification has been written."""
+        if self._thread is not None and self._pid == os.getpid():
+            # A dead worker would leave the queue unfinished forever
+            self._ensure_started()
+            self._queue.join()
+
+    def shutdown(self):
+        """Write the remaining notifications and stop the worker thread."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+
+notification_writer = NotificationWriter(
+    synchronous=os.getenv("NOTIFICATIONS_SYNC", "false").lower() == "true"
+)
+atexit.register(notification_writer.shutdown)
 
 
 class Notification:
@@ -14,9 +220,11 @@ class Notification:
     @staticmethod
     def create(user_id, notif_type, content, related_id=None):
         """
-        Create a new notification for a user.
+        Create a new notification for a user. The notification is written in
+        the background; its ID is assigned up front so it can be returned.
         """
         notification = {
+            "_id": ObjectId(),
             "user_id": ObjectId(user_id),
             "type": notif_type,
             "content": content,
@@ -25,37 +233,164 @@ class Notification:
             "created_at": datetime.datetime.now(),
         }
 
-        result = db.notifications.insert_one(notification)
-        notification["_id"] = result.inserted_id
+        notification_writer.submit(notification)
         return notification
 
     @staticmethod
-    def get_by_user_id(user_id):
+    def get_by_user_id(user_id, limit=None, before=None):
         """
-        Retrieve all notifications for a specific user.
+        Retrieve a page of notifications for a specific user, newest first.
+        Pass the ID of the last notification of a page as `before` to get the
+        next page. Returns a (notifications, next_page_token) tuple; raises
+        ValueError if `before` is not a valid notification ID.
         """
+        limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        query = {"user_id": ObjectId(user_id)}
+        if before:
+            if not ObjectId.is_valid(before):
+                raise ValueError(f"Invalid notification ID: {before}")
+            query["_id"] = {"$lt": ObjectId(before)}
+
         notifications = list(
-            db.notifications.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
+            db.notifications.find(query).sort("_id", -1).limit(limit + 1)
         )
+        next_page_token = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            next_page_token = str(notifications[-1]["_id"])
 
-        return notifications
+        return notifications, next_page_token
 
     @staticmethod
-    def mark_as_read(notification_id):
+    def get_unread_count(user_id):
         """
-        Mark a specific notification as read.
+        Return the number of unread notifications of a user from their counter.
+        The counter is created by counting on first use, so counters only
+        track users whose notifications have been counted in full.
         """
+        counter = db.notification_counters.find_one(
+            {"_id": ObjectId(user_id)}, {"unread": 1, "counting": 1}
+        )
+        # A counter still marked as counting is being, or failed to be, recounted
+        if not counter or counter.get("counting"):
+            return Notification.recount_unread(user_id)
+        return max(counter.get("unread", 0), 0)
+
+    @staticmethod
+    def get_version(user_id):
+        """
+        Get a (version, unread) pair from a user's counter that changes with
+        every notification created or read, or None if there is no counter.
+        """
+        counter = db.notification_counters.find_one(
+            {"_id": ObjectId(user_id)}, {"version": 1, "unread": 1}
+        )
+        return (counter.get("version", 0), counter.get("unread", 0)) if counter else None
+
+    @staticmethod
+    def _decrement_unread(user_id, count):
+        """Subtract newly read notifications from a user's unread counter."""
+        if count:
+            db.notification_counters.update_one(
+                {"_id": ObjectId(user_id)},
+                {"$inc": {"unread": -count, "version": 1}},
+            )
+
+    @staticmethod
+    def mark_as_read(notification_id, user_id):
+        """
+        Mark a specific notification of a user as read, recording when it was
+        read for the retention TTL. Returns False if the user has no such
+        notification.
+        """
+        query = {"_id": ObjectId(notification_id), "user_id": ObjectId(user_id)}
+        # Only a notification that is still unread is updated, so read_at
+        # keeps the time it was first read
         result = db.notifications.update_one(
-            {"_id": ObjectId(notification_id)}, {"$set": {"read": True}}
+            dict(query, read=False),
+            {"$set": {"read": True, "read_at": datetime.datetime.now()}},
         )
-        return result.modified_count > 0
+        if result.modified_count:
+            Notification._decrement_unread(user_id, result.modified_count)
+            return True
+        return db.notifications.count_documents(query, limit=1) > 0
+
+    @staticmethod
+    def mark_many_as_read(user_id, notification_ids=None, before=None):
+        """
+        Mark unread notifications of a user as read in a single update: those
+        in notification_ids, those created before the `before` datetime, or
+        all of them when neither is given. Returns the number marked.
+        """
+        query = {"user_id": ObjectId(user_id), "read": False}
+        if notification_ids is not None:
+            query["_id"] = {"$in": [ObjectId(n) for n in notification_ids]}
+        if before is not None:
+            query["created_at"] = {"$lt": before}
+
+        result = db.notifications.update_many(
+            query, {"$set": {"read": True, "read_at": datetime.datetime.now()}}
+        )
+        Notification._decrement_unread(user_id, result.modified_count)
+        return result.modified_count
 
     @staticmethod
     def mark_all_as_read(user_id):
         """
         Mark all unread notifications for a user as read.
         """
+        return Notification.mark_many_as_read(user_id)
+
+    @staticmethod
+    def backfill_read_at():
+        """
+        Set read_at on read notifications that have none, so the retention
+        TTL counts from now for them. Returns the number updated.
+        """
         result = db.notifications.update_many(
-            {"user_id": ObjectId(user_id), "read": False}, {"$set": {"read": True}}
+            {"read": True, "read_at": {"$exists": False}},
+            {"$set": {"read_at": datetime.datetime.now()}},
         )
         return result.modified_count
+
+    @staticmethod
+    def recount_unread(user_id):
+        """
+        Recompute a user's unread counter from their notifications, repairing
+        any drift left by an interrupted update. The counter is created first,
+        marked as counting, so notifications stored while counting bump its
+        version; it is only replaced if its version did not change while
+        counting, so those increments are not overwritten, and otherwise the
+        count is retried.
+        """
+        user_id = ObjectId(user_id)
+        try:
+            db.notification_counters.update_one(
+                {"_id": user_id},
+                {"$setOnInsert": {"unread": 0, "version": 0, "counting": True}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Created by a concurrent recount
+            pass
+
+        unread = 0
+        for _ in range(RECOUNT_ATTEMPTS):
+            counter = db.notification_counters.find_one({"_id": user_id}, {"version": 1})
+            unread = db.notifications.count_documents({"user_id": user_id, "read": False})
+            if counter is None:
+                # Deleted after a failed increment; the next read recounts
+                return unread
+            # A missing version matches None as well
+            result = db.notification_counters.update_one(
+                {"_id": user_id, "version": counter.get("version")},
+                {
+                    "$set": {"unread": unread},
+                    "$inc": {"version": 1},
+                    "$unset": {"counting": ""},
+                },
+            )
+            if result.modified_count:
+                return unread
+        logger.warning("Gave up recounting the unread notifications of %s", user_id)
+        return unread
@@ -3,7 +3,86 @@ Model for travel preferences of a user.
 """
 import datetime
 from bson import ObjectId
-from .db import db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .db import db, read_db
+from .matching import matching_engine
+from .profile import PublicProfile
+
+# User fields needed to render a match; password hashes never leave MongoDB
+MATCH_USER_PROJECTION = {"name": 1, "profile_picture": 1}
+
+# Default and maximum number of results per page of matches
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Preference fields included in match results
+MATCH_PREFERENCE_FIELDS = ("budget", "travel_style", "food_preferences", "destination")
+
+
+# Callbacks run after a user's preferences are saved or deleted, with the
+# user ID and the saved document (None after a delete)
+_change_hooks = []
+
+
+def on_preferences_change(hook):
+    """Register a preferences change hook; usable as a decorator."""
+    _change_hooks.append(hook)
+    return hook
+
+
+def _notify_change(user_id, preference):
+    """Run the change hooks for a user's preferences."""
+    for hook in _change_hooks:
+        hook(user_id, preference)
+
+
+@on_preferences_change
+def _update_matching_engine(user_id, preference):
+    """Keep the in-memory matching index in step with the collection."""
+    if preference is None:
+        matching_engine.remove(ObjectId(user_id))
+    else:
+        matching_engine.upsert(preference)
+
+
+@on_preferences_change
+def _invalidate_public_profile(user_id, preference):
+    """Public profiles embed the preferences, so drop the cached copy."""
+    PublicProfile.invalidate(user_id)
+
+
+def _users_by_id(user_ids):
+    """Fetch the match fields of many users in one query, keyed by user ID."""
+    return {
+        user["_id"]: user
+        for user in db.users.find(
+            {"_id": {"$in": user_ids}, "deleted_at": {"$exists": False}},
+            MATCH_USER_PROJECTION,
+        )
+    }
+
+
+def _page_size(limit):
+    """Clamp a requested page size to the allowed range."""
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _format_match(user, preference):
+    """Format a user and their preferences as a match result."""
+    return {
+        "user": {
+            "id": str(user["_id"]),
+            "name": user.get("name", ""),
+            "profile_picture": user.get("profile_picture", ""),
+        },
+        "preferences": {
+            "budget": preference.get("budget") or "",
+            "travel_style": preference.get("travel_style") or "",
+            "food_preferences": preference.get("food_preferences") or [],
+            "destination": preference.get("destination") or "",
+        },
+    }
 
 
 class TravelPreference:
@@ -11,12 +90,13 @@ class TravelPreference:
     Model for handling user travel preferences.
     """
     @staticmethod
-    def create_or_update(user_id, data):
+    def create_or_update(user_id, data, upsert=True):
         """
-        Create or update a user's preferences.
+        Create or update a user's preferences in one atomic round-trip and
+        return the saved document. With upsert=False only existing
+        preferences are updated, and None is returned if there are none.
         """
-        preference = {
-            "user_id": ObjectId(user_id),
+        fields = {
             "budget": data.get("budget", ""),
             "travel_style": data.get("travel_style", ""),
             "arrival_time": data.get("arrival_time", ""),
@@ -26,17 +106,23 @@ class TravelPreference:
             "updated_at": datetime.datetime.now(),
         }
 
-        existing = db.travel_preferences.find_one({"user_id": ObjectId(user_id)})
-
-        if existing:
-            db.travel_preferences.update_one(
-                {"user_id": ObjectId(user_id)}, {"$set": preference}
-            )
-            preference["_id"] = existing["_id"]
-        else:
-            result = db.travel_preferences.insert_one(preference)
-            preference["_id"] = result.inserted_id
+        # The unique user_id index makes concurrent upserts converge on one
+        # document; the losing insert is retried as an update
+        for attempt in range(2):
+            try:
+                preference = db.travel_preferences.find_one_and_update(
+                    {"user_id": ObjectId(user_id)},
+                    {"$set": fields},
+                    upsert=upsert,
+                    return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                if attempt:
+                    raise
 
+        if preference is not None:
+            _notify_change(user_id, preference)
         return preference
 
     @staticmethod
@@ -47,65 +133,70 @@ class TravelPreference:
         preference = db.travel_preferences.find_one({"user_id": ObjectId(user_id)})
         return preference
 
+    @staticmethod
+    def get_updated_at(user_id):
+        """
+        Get when a user's preferences were last updated, or None.
+        """
+        preference = db.travel_preferences.find_one(
+            {"user_id": ObjectId(user_id)}, {"updated_at": 1}
+        )
+        return preference.get("updated_at") if preference else None
+
     @staticmethod
     def delete_by_user_id(user_id):
         """
         Delete a user's travel preferences.
         """
         result = db.travel_preferences.delete_one({"user_id": ObjectId(user_id)})
+        _notify_change(user_id, None)
         return result.deleted_count > 0
 
     @staticmethod
-    def find_matches(user_id):
+    def find_matches(user_id, limit=None, page_token=None):
         """
-        Find users with similar/matching preferences.
+        Find users with similar/matching preferences, ranked by similarity.
+        Users sharing only some attributes are included with a lower score.
+        Returns a (matches, next_page_token) tuple; raises ValueError if the
+        page token is malformed.
         """
-        user_pref = db.travel_preferences.find_one({"user_id": ObjectId(user_id)})
-
-        if not user_pref:
-            return []
-
-        query = {"user_id": {"$ne": ObjectId(user_id)}}
-
-        if user_pref.get("budget"):
-            query["budget"] = user_pref.get("budget")
-
-        if user_pref.get("travel_style"):
-            query["travel_style"] = user_pref.get("travel_style")
-
-        if user_pref.get("destination"):
-            query["destination"] = user_pref.get("destination")
-
-        matches = list(db.travel_preferences.find(query))
-
-        user_ids = [match["user_id"] for match in matches]
-        user_details = list(db.users.find({"_id": {"$in": user_ids}}))
+        limit = _page_size(limit)
+        after = None
+        if page_token:
+            score, _, match_id = page_token.partition(":")
+            if not ObjectId.is_valid(match_id):
+                raise ValueError(f"Invalid page token: {page_token}")
+            after = (ObjectId(match_id), float(score))
+
+        ranked = matching_engine.find_matches(ObjectId(user_id), limit + 1, after)
+        next_page_token = None
+        if len(ranked) > limit:
+            ranked = ranked[:limit]
+            next_page_token = f"{ranked[-1][1]}:{ranked[-1][0]}"
+        if not ranked:
+            return [], None
+
+        user_details = _users_by_id([match_id for match_id, _ in ranked])
 
         result = []
-        for user in user_details:
-            user_pref = next((p for p in matches if p["user_id"] == user["_id"]), None)
-            if user_pref:
-                result.append(
-                    {
-                        "user": {
-                            "id": str(user["_id"]),
-                            "name": user["name"],
-                            "profile_picture": user.get("profile_picture", ""),
-                        },
-                        "preferences": {
-                            "budget": user_pref.get("budget", ""),
-                            "travel_style": user_pref.get("travel_style", ""),
-                            "food_preferences": user_pref.get("food_preferences", []),
-                            "destination": user_pref.get("destination", ""),
-                        },
-                    }
-                )
+        for match_id, score in ranked:
+            user = user_details.get(match_id)
+            user_pref = matching_engine.get_profile(match_id)
+            if user and user_pref:
+                match = _format_match(user, user_pref)
+                match["score"] = score
+                result.append(match)
 
-        return result
+        return result, next_page_token
 
     @staticmethod
-    def search_by_criteria(criteria):
-        """Search for users based on specific criteria"""
+    def search_by_criteria(criteria, limit=None, page_token=None):
+        """
+        Search for users based on specific criteria, ordered by user ID.
+        Returns a (matches, next_page_token) tuple; raises ValueError if the
+        page token is malformed.
+        """
+        limit = _page_size(limit)
         query = {}
 
         if criteria.get("budget"):
@@ -120,31 +211,38 @@ class TravelPreference:
         if criteria.get("food_preferences"):
             query["food_preferences"] = {"$in": criteria.get("food_preferences")}
 
-        preferences = list(db.travel_preferences.find(query))
-
-        user_ids = [pref["user_id"] for pref in preferences]
-        user_details = list(db.users.find({"_id": {"$in": user_ids}}))
-
-        result = []
-        for user in user_details:
-            user_pref = next(
-                (p for p in preferences if p["user_id"] == user["_id"]), None
-            )
-            if user_pref:
-                result.append(
-                    {
-                        "user": {
-                            "id": str(user["_id"]),
-                            "name": user["name"],
-                            "profile_picture": user.get("profile_picture", ""),
-                        },
-                        "preferences": {
-                            "budget": user_pref.get("budget", ""),
-                            "travel_style": user_pref.get("travel_style", ""),
-                            "food_preferences": user_pref.get("food_preferences", []),
-                            "destination": user_pref.get("destination", ""),
-                        },
-                    }
-                )
-
-        return result
+        if page_token:
+            if not ObjectId.is_valid(page_token):
+                raise ValueError(f"Invalid page token: {page_token}")
+            query["user_id"] = {"$gt": ObjectId(page_token)}
+
+        # Join each preference with its user inside MongoDB, projecting only
+        # the rendered fields, and build results as the cursor streams in
+        projection = {field: 1 for field in MATCH_PREFERENCE_FIELDS}
+        projection.update({f"user.{field}": 1 for field in MATCH_USER_PROJECTION})
+        projection["user._id"] = 1
+        pipeline = [
+            {"$match": query},
+            {"$sort": {"user_id": 1}},
+            {
+                "$lookup": {
+                    "from": "users",
+                    "localField": "user_id",
+                    "foreignField": "_id",
+                    "as": "user",
+                }
+            },
+            {"$unwind": "$user"},
+            # Deleted users stay tombstoned until their data is purged
+            {"$match": {"user.deleted_at": {"$exists": False}}},
+            {"$limit": limit + 1},
+            {"$project": projection},
+        ]
+
+        matches = list(read_db.travel_preferences.aggregate(pipeline))
+        next_page_token = None
+        if len(matches) > limit:
+            matches = matches[:limit]
+            next_page_token = str(matches[-1]["user"]["_id"])
+
+        return [_format_match(match["user"], match) for match in matches], next_page_token
@@ -0,0 +1,109 @@
+"""
+Public profile model serving cached, denormalized views of user profiles.
+"""
+import asyncio
+import datetime
+import hashlib
+import json
+from bson import ObjectId
+from .async_db import get_async_db
+from .cache import TTLCache
+from .db import db
+
+# Recently built public profiles, keyed by user ID string
+_profile_cache = TTLCache(maxsize=10000, ttl=300)
+
+PUBLIC_PREFERENCE_FIELDS = (
+    "destination",
+    "budget",
+    "travel_style",
+    "food_preferences",
+    "accommodation_type",
+    "arrival_time",
+)
+
+USER_PROJECTION = {"name": 1, "created_at": 1, "updated_at": 1}
+PREFERENCE_PROJECTION = dict.fromkeys(PUBLIC_PREFERENCE_FIELDS + ("updated_at",), 1)
+
+
+def _user_query(user_id):
+    """Query matching a user that has not been deleted."""
+    return {"_id": ObjectId(user_id), "deleted_at": {"$exists": False}}
+
+
+def _build_profile(user, preferences):
+    """Build the cached profile entry from a user and their preferences."""
+    data = {"id": str(user["_id"]), "name": user["name"], "preferences": None}
+    modified_times = [user.get("updated_at") or user.get("created_at")]
+    if preferences:
+        data["preferences"] = {
+            field: preferences.get(field) for field in PUBLIC_PREFERENCE_FIELDS
+        }
+        modified_times.append(preferences.get("updated_at"))
+
+    fingerprint = json.dumps(data, sort_keys=True, default=str).encode()
+    return {
+        "data": data,
+        "etag": hashlib.md5(fingerprint).hexdigest(),
+        "last_modified": max(
+            (t for t in modified_times if t), default=datetime.datetime.now()
+        ),
+    }
+
+
+class PublicProfile:
+    """
+    Builds the public view of a user (name and travel preferences) once and
+    serves it from an in-process cache until the user or their preferences
+    change. Each profile carries an ETag and last-modified time so clients
+    can revalidate cheaply.
+    """
+    @staticmethod
+    def get(user_id):
+        """
+        Get the public profile of a user as a dict with "data", "etag" and
+        "last_modified" keys, or None if the user does not exist.
+        """
+        profile = _profile_cache.get(str(user_id))
+        if profile is not None:
+            return profile
+
+        user = db.users.find_one(_user_query(user_id), USER_PROJECTION)
+        if not user:
+            return None
+
+        preferences = db.travel_preferences.find_one(
+            {"user_id": ObjectId(user_id)}, PREFERENCE_PROJECTION
+        )
+        profile = _build_profile(user, preferences)
+        _profile_cache.set(str(user_id), profile)
+        return profile
+
+    @staticmethod
+    async def get_async(user_id):
+        """
+        Same as `get`, using the async client. The user and their preferences
+        are fetched concurrently.
+        """
+        profile = _profile_cache.get(str(user_id))
+        if profile is not None:
+            return profile
+
+        database = get_async_db()
+        user, preferences = await asyncio.gather(
+            database.users.find_one(_user_query(user_id), USER_PROJECTION),
+            database.travel_preferences.find_one(
+                {"user_id": ObjectId(user_id)}, PREFERENCE_PROJECTION
+            ),
+        )
+        if not user:
+            return None
+
+        profile = _build_profile(user, preferences)
+        _profile_cache.set(str(user_id), profile)
+        return profile
+
+    @staticmethod
+    def invalidate(user_id):
+        """Drop a user's public profile after their user or preferences change."""
+        _profile_cache.invalidate(str(user_id))
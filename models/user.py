@@ -4,8 +4,14 @@ import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from .async_db import get_async_db
+from .cache import TTLCache
 from .db import db
 
+# Recently loaded users, keyed by user ID string
+_user_cache = TTLCache(maxsize=10000, ttl=60)
+
 
 class User(UserMixin):
     """Represents a user in the application."""
@@ -18,25 +24,51 @@ class User(UserMixin):
         self.password_hash = user_data.get("password_hash", "")
         self.profile_picture = user_data.get("profile_picture", "")
         self.created_at = user_data.get("created_at", datetime.datetime.now())
+        self.updated_at = user_data.get("updated_at", self.created_at)
 
     @staticmethod
     def get_by_id(user_id):
-        """Find a user with their ID."""
-        user_data = db.users.find_one({"_id": ObjectId(user_id)})
-        return User(user_data) if user_data else None
+        """Find a user with their ID, using the user cache when possible."""
+        user = _user_cache.get(str(user_id))
+        if user is None:
+            user_data = db.users.find_one(
+                {"_id": ObjectId(user_id), "deleted_at": {"$exists": False}}
+            )
+            if not user_data:
+                return None
+            user = User(user_data)
+            _user_cache.set(user.id, user)
+        return user
+
+    @staticmethod
+    async def exists_async(user_id):
+        """Check that a user exists and is not deleted, using the async client."""
+        if _user_cache.get(str(user_id)) is not None:
+            return True
+        user_data = await get_async_db().users.find_one(
+            {"_id": ObjectId(user_id), "deleted_at": {"$exists": False}}, {"_id": 1}
+        )
+        return user_data is not None
+
+    @staticmethod
+    def invalidate(user_id):
+        """Drop a user from the cache after their document changes."""
+        _user_cache.invalidate(str(user_id))
 
     @staticmethod
     def get_by_email(email):
         """Find a user with their email."""
-        user_data = db.users.find_one({"email": email})
+        user_data = db.users.find_one(
+            {"email": email, "deleted_at": {"$exists": False}}
+        )
         return User(user_data) if user_data else None
 
     @staticmethod
     def create_user(name, email, password):
-        """Create a new user and save it to the database."""
-        if db.users.find_one({"email": email}):
-            return None
-
+        """
+        Create a new user and save it to the database.
+        Returns None if the email is already registered.
+        """
         user_data = {
             "name": name,
             "email": email,
@@ -44,7 +76,10 @@ class User(UserMixin):
             "profile_picture": "",
             "created_at": datetime.datetime.now(),
         }
-        result = db.users.insert_one(user_data)
+        try:
+            result = db.users.insert_one(user_data)
+        except DuplicateKeyError:
+            return None
         user_data["_id"] = result.inserted_id
         return User(user_data)
 
@@ -0,0 +1,31 @@
+"""
+Version counters stored in MongoDB that are bumped whenever the documents of
+a collection change, so every process can tell cheaply, and consistently
+across restarts, whether data it derived from them is still current.
+"""
+from pymongo import ReturnDocument
+from .db import db
+
+# Counter names
+PREFERENCES = "travel_preferences"
+USERS = "users"
+
+
+def bump_version(name):
+    """Increment a counter and return its new value."""
+    counter = db.versions.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return counter["version"]
+
+
+def get_versions(*names):
+    """Return the values of counters, in order, in one query; 0 if never bumped."""
+    counters = {
+        counter["_id"]: counter["version"]
+        for counter in db.versions.find({"_id": {"$in": list(names)}})
+    }
+    return tuple(counters.get(name, 0) for name in names)
@@ -0,0 +1,91 @@
+"""
+Production launcher running the app under gunicorn.
+
+    python serve.py
+
+Settings come from the environment: BIND (default 0.0.0.0:8000),
+WEB_CONCURRENCY (worker processes, default 2 x CPUs + 1), GUNICORN_THREADS
+(threads per worker, default 32), GUNICORN_RESERVED_THREADS (threads per
+worker kept free of event streams, default 8), GUNICORN_TIMEOUT (seconds,
+default 60), GUNICORN_MAX_REQUESTS (recycle workers after this many
+requests, default 0 for never) and PRELOAD_APP (default true).
+
+Every open page holds a thread for its event stream, so workers run many
+threads, and at most GUNICORN_THREADS - GUNICORN_RESERVED_THREADS of them
+serve event streams and long polls at once (MAX_EVENT_CONNECTIONS overrides
+this). Pages beyond that fall back to polling.
+
+With PRELOAD_APP the app is imported once in the master process and the
+workers are forked from it, which saves memory and start-up time. Each
+worker then drops the MongoDB client it inherited and creates its own.
+"""
+import multiprocessing
+import os
+from gunicorn.app.base import BaseApplication
+from models.db import reset_client
+
+
+def gunicorn_options():
+    """Build the gunicorn settings from the environment."""
+    threads = int(os.getenv("GUNICORN_THREADS", "32"))
+    return {
+        "bind": os.getenv("BIND", "0.0.0.0:8000"),
+        "workers": int(
+            os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1))
+        ),
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        # Longer than the long-poll timeout so waiting clients are not killed
+        "timeout": int(os.getenv("GUNICORN_TIMEOUT", "60")),
+        "max_requests": int(os.getenv("GUNICORN_MAX_REQUESTS", "0")),
+        "max_requests_jitter": int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0")),
+        "preload_app": os.getenv("PRELOAD_APP", "true").lower() == "true",
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }
+
+
+def app_config(options):
+    """Build the app settings that depend on the gunicorn settings."""
+    reserved = int(os.getenv("GUNICORN_RESERVED_THREADS", "8"))
+    limit = os.getenv("MAX_EVENT_CONNECTIONS")
+    return {
+        "MAX_EVENT_CONNECTIONS": (
+            int(limit) if limit else max(0, options["threads"] - reserved)
+        ),
+    }
+
+
+def post_fork(server, worker):
+    """Give each worker its own MongoDB client and connection pool."""
+    reset_client()
+    server.log.info("Worker %s reset the MongoDB client", worker.pid)
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving the Flask app with the given options."""
+
+    def __init__(self, options=None, config=None):
+        self.options = options or {}
+        self.config = config
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        from app import create_app  # pylint: disable=import-outside-toplevel
+
+        return create_app(self.config)
+
+
+def main():
+    """Start gunicorn with settings from the environment."""
+    options = gunicorn_options()
+    Server(options, app_config(options)).run()
+
+
+if __name__ == "__main__":
+    main()
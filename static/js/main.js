@@ -8,8 +8,89 @@ document.addEventListener("DOMContentLoaded", () => {
     fetchMatches();
     setupProfileButtons();
     fetchNotifications();
+    setupRealtimeNotifications();
+    setupMarkAllReadButton();
 });
 
+// Realtime event handlers registered by the page, keyed by event type
+const realtimeHandlers = {};
+let realtimeConnected = false;
+
+// Events only reach pages connected to the worker that published them, so
+// pages also poll at this interval to pick up events from other workers
+const REALTIME_FALLBACK_POLL_MS = 30000;
+
+// Register a handler for a realtime event type and open the shared
+// connection on first use
+function onRealtimeEvent(type, handler) {
+    if (!realtimeHandlers[type]) {
+        realtimeHandlers[type] = [];
+    }
+    realtimeHandlers[type].push(handler);
+    
+    if (!realtimeConnected) {
+        realtimeConnected = true;
+        connectRealtime();
+    }
+}
+
+function dispatchRealtimeEvent(type, data) {
+    (realtimeHandlers[type] || []).forEach(handler => handler(data));
+}
+
+// Connect to the server-sent event stream, falling back to long polling
+function connectRealtime() {
+    if (!window.EventSource) {
+        longPollEvents();
+        return;
+    }
+    
+    const source = new EventSource("/api/events/stream");
+    ["message", "notification", "resync"].forEach(type => {
+        source.addEventListener(type, (event) => {
+            dispatchRealtimeEvent(type, JSON.parse(event.data));
+        });
+    });
+    
+    // The browser gives up when the server is out of connection slots
+    // (503); keep going with long polling, which backs off while busy
+    source.addEventListener("error", () => {
+        if (source.readyState === EventSource.CLOSED) {
+            longPollEvents();
+        }
+    });
+}
+
+// Long-poll for events, resuming from the last event ID seen
+async function longPollEvents() {
+    let lastEventId = null;
+    while (true) {
+        try {
+            const params = lastEventId === null ? "" : `?last_event_id=${lastEventId}`;
+            const response = await fetch(`/api/events${params}`);
+            if (!response.ok) {
+                throw new Error("Failed to fetch events");
+            }
+            
+            const result = await response.json();
+            result.data.forEach(event => dispatchRealtimeEvent(event.type, event.data));
+            lastEventId = result.last_event_id;
+        } catch (error) {
+            console.error("Error fetching events:", error);
+            await new Promise(resolve => setTimeout(resolve, 5000));
+        }
+    }
+}
+
+// Refresh notifications when the server pushes a new one
+function setupRealtimeNotifications() {
+    if (document.getElementById("notifications-container")) {
+        onRealtimeEvent("notification", () => fetchNotifications());
+        onRealtimeEvent("resync", () => fetchNotifications());
+        setInterval(fetchNotifications, REALTIME_FALLBACK_POLL_MS);
+    }
+}
+
 // Handle login form submission
 function setupLoginForm() {
     const loginForm = document.querySelector("form[action='/login']");
@@ -153,12 +234,13 @@ function setupLogoutButton() {
     }
 }
 
-// Fetch and display matches dynamically
-async function fetchMatches() {
+// Fetch and display matches dynamically, one page at a time
+async function fetchMatches(pageToken = null) {
     const matchesContainer = document.getElementById("matches-container");
     if (matchesContainer) {
         try {
-            const response = await fetch("/api/matches");
+            const params = pageToken ? `?page_token=${encodeURIComponent(pageToken)}` : "";
+            const response = await fetch(`/api/matches${params}`);
             if (!response.ok) {
                 throw new Error("Failed to fetch matches");
             }
@@ -166,9 +248,13 @@ async function fetchMatches() {
             const result = await response.json();
             
             if (result.status === "success" && result.data) {
-                matchesContainer.innerHTML = "";
+                if (pageToken) {
+                    document.getElementById("load-more-matches")?.remove();
+                } else {
+                    matchesContainer.innerHTML = "";
+                }
                 
-                if (result.data.length === 0) {
+                if (result.data.length === 0 && !pageToken) {
                     matchesContainer.innerHTML = "<p>No matches found. Update your preferences to find travel partners!</p>";
                     return;
                 }
@@ -181,7 +267,8 @@ async function fetchMatches() {
                                 <p class="card-text">
                                     <strong>Budget:</strong> ${match.preferences.budget}<br>
                                     <strong>Travel Style:</strong> ${match.preferences.travel_style}<br>
-                                    <strong>Destination:</strong> ${match.preferences.destination}
+                                    <strong>Destination:</strong> ${match.preferences.destination}<br>
+                                    <strong>Match:</strong> ${Math.round(match.score * 100)}%
                                 </p>
                                 <button class="btn btn-primary view-profile" data-user-id="${match.user.id}">View Profile</button>
                                 <button class="btn btn-success bookmark-user" data-user-id="${match.user.id}">Bookmark</button>
@@ -190,8 +277,16 @@ async function fetchMatches() {
                         </div>`;
                 });
                 
+                if (result.next_page_token) {
+                    matchesContainer.innerHTML += `
+                        <button id="load-more-matches" class="btn btn-secondary mt-3">Load more matches</button>`;
+                }
+                
                 // Set up event listeners after adding all matches to the DOM
                 setupProfileButtons();
+                document.getElementById("load-more-matches")?.addEventListener("click", () => {
+                    fetchMatches(result.next_page_token);
+                });
             } else {
                 matchesContainer.innerHTML = "<p>Error loading matches. Please try again later.</p>";
             }
@@ -247,12 +342,13 @@ function setupProfileButtons() {
     });
 }
 
-// Fetch and display notifications
-async function fetchNotifications() {
+// Fetch and display notifications, one page at a time
+async function fetchNotifications(pageToken = null) {
     const notificationsContainer = document.getElementById("notifications-container");
     if (notificationsContainer) {
         try {
-            const response = await fetch("/api/notifications");
+            const params = pageToken ? `?before=${encodeURIComponent(pageToken)}` : "";
+            const response = await fetch(`/api/notifications${params}`);
             if (!response.ok) {
                 throw new Error("Failed to fetch notifications");
             }
@@ -260,13 +356,19 @@ async function fetchNotifications() {
             const result = await response.json();
             
             if (result.status === "success" && result.data) {
-                notificationsContainer.innerHTML = "";
+                if (pageToken) {
+                    document.getElementById("load-more-notifications")?.remove();
+                } else {
+                    notificationsContainer.innerHTML = "";
+                    fetchUnreadCount();
+                }
                 
-                if (result.data.length === 0) {
+                if (result.data.length === 0 && !pageToken) {
                     notificationsContainer.innerHTML = "<p>No notifications</p>";
                     return;
                 }
                 
+                let notificationsHTML = "";
                 result.data.forEach(notification => {
                     // Create notification element with appropriate styling based on read status
                     const notifClass = notification.read ? "notification" : "notification unread";
@@ -283,15 +385,18 @@ async function fetchNotifications() {
                             <small>${new Date(notification.created_at).toLocaleString()}</small>
                         </div>`;
                     
-                    notificationsContainer.innerHTML += `
+                    notificationsHTML += `
                         <div class="${notifClass}" data-notification-id="${notification.id}">
                             ${notificationContent}
                             ${!notification.read ? '<button class="mark-read-btn">Mark as Read</button>' : ''}
                         </div>`;
                 });
                 
+                const page = document.createElement("template");
+                page.innerHTML = notificationsHTML;
+                
                 // Add event listeners for "Mark as Read" buttons
-                document.querySelectorAll('.mark-read-btn').forEach(button => {
+                page.content.querySelectorAll('.mark-read-btn').forEach(button => {
                     button.addEventListener('click', async (event) => {
                         const notificationElement = event.target.closest('.notification');
                         const notificationId = notificationElement.getAttribute('data-notification-id');
@@ -309,6 +414,7 @@ async function fetchNotifications() {
                                 // Update UI to reflect read status
                                 notificationElement.classList.remove('unread');
                                 event.target.remove();
+                                fetchUnreadCount();
                             }
                         } catch (error) {
                             console.error("Error marking notification as read:", error);
@@ -317,7 +423,7 @@ async function fetchNotifications() {
                 });
                 
                 // Add event listeners for clickable notifications (messages)
-                document.querySelectorAll('.notification-content.clickable').forEach(content => {
+                page.content.querySelectorAll('.notification-content.clickable').forEach(content => {
                     content.addEventListener('click', () => {
                         const userId = content.getAttribute('data-user-id');
                         if (userId) {
@@ -325,6 +431,18 @@ async function fetchNotifications() {
                         }
                     });
                 });
+                
+                notificationsContainer.appendChild(page.content);
+                
+                // Offer the next page if there is one
+                if (result.next_page_token) {
+                    const loadMoreButton = document.createElement("button");
+                    loadMoreButton.id = "load-more-notifications";
+                    loadMoreButton.className = "btn btn-secondary mt-2";
+                    loadMoreButton.textContent = "Load older notifications";
+                    loadMoreButton.addEventListener("click", () => fetchNotifications(result.next_page_token));
+                    notificationsContainer.appendChild(loadMoreButton);
+                }
             } else {
                 notificationsContainer.innerHTML = "<p>Error loading notifications</p>";
             }
@@ -334,3 +452,46 @@ async function fetchNotifications() {
         }
     }
 }
+
+// Mark every notification as read with a single request
+function setupMarkAllReadButton() {
+    const markAllButton = document.getElementById("mark-all-read-btn");
+    if (markAllButton) {
+        markAllButton.addEventListener("click", async () => {
+            try {
+                const response = await fetch("/api/notifications", {
+                    method: "PUT",
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({ all: true })
+                });
+                
+                if (response.ok) {
+                    fetchNotifications();
+                }
+            } catch (error) {
+                console.error("Error marking notifications as read:", error);
+            }
+        });
+    }
+}
+
+// Show the number of unread notifications next to the notifications heading
+async function fetchUnreadCount() {
+    const unreadBadge = document.getElementById("notifications-unread-count");
+    if (unreadBadge) {
+        try {
+            const response = await fetch("/api/notifications/unread_count");
+            if (!response.ok) {
+                throw new Error("Failed to fetch unread count");
+            }
+            
+            const result = await response.json();
+            const unreadCount = result.data.unread_count;
+            unreadBadge.textContent = unreadCount > 0 ? `${unreadCount} unread` : "";
+        } catch (error) {
+            console.error("Error fetching unread count:", error);
+        }
+    }
+}
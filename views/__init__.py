@@ -0,0 +1,26 @@
+"""
+Blueprints serving the HTML pages and the JSON API. The view modules are only
+imported when create_app registers them.
+"""
+import importlib
+
+# Modules in this package, each defining a `blueprint`
+BLUEPRINTS = (
+    "health",
+    "pages",
+    "auth",
+    "users",
+    "preferences",
+    "matches",
+    "bookmarks",
+    "messages",
+    "notifications",
+    "events",
+)
+
+
+def register_blueprints(app):
+    """Import the view modules and register their blueprints on the app."""
+    for name in BLUEPRINTS:
+        module = importlib.import_module(f"{__name__}.{name}")
+        app.register_blueprint(module.blueprint)
@@ -0,0 +1,133 @@
+"""Login, registration and the Flask-Login user loader."""
+
+from flask import Blueprint, g, jsonify, redirect, request
+from flask_login import LoginManager, login_required, login_user, logout_user
+from models import Notification, User
+
+blueprint = Blueprint("auth", __name__)
+
+login_manager = LoginManager()
+
+
+def get_user(user_id):
+    """Find a user by ID, memoized for the rest of the current request."""
+    users = g.setdefault("users", {})
+    if user_id not in users:
+        users[user_id] = User.get_by_id(user_id)
+    return users[user_id]
+
+
+# User loader for Flask-Login
+@login_manager.user_loader
+def load_user(user_id):
+    return get_user(user_id)
+
+
+# Authentication routes
+@blueprint.route("/api/auth/register", methods=["POST"])
+def register():
+    """Register a new user"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    # Validate required fields
+    required_fields = ["name", "email", "password"]
+    for field in required_fields:
+        if field not in data:
+            return (
+                jsonify(
+                    {"status": "error", "message": f"Missing required field: {field}"}
+                ),
+                400,
+            )
+
+    # Create user, the unique email index rejects existing accounts
+    user = User.create_user(data["name"], data["email"], data["password"])
+    if not user:
+        return jsonify({"status": "error", "message": "Email already registered"}), 409
+
+    # Create welcome notification
+    Notification.create(
+        user.id,
+        "welcome",
+        "Welcome to Travel Match! Complete your profile to get started.",
+    )
+
+    # Login the user
+    login_user(user)
+
+    # Return success response
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "User registered successfully",
+                "user": {"id": user.id, "name": user.name, "email": user.email},
+            }
+        ),
+        201,
+    )
+
+
+@blueprint.route("/api/auth/login", methods=["POST"])
+def login():
+    """Login a user"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    # Validate required fields
+    required_fields = ["email", "password"]
+    for field in required_fields:
+        if field not in data:
+            return (
+                jsonify(
+                    {"status": "error", "message": f"Missing required field: {field}"}
+                ),
+                400,
+            )
+
+    # Find user by email
+    user = User.get_by_email(data["email"])
+    if not user:
+        return jsonify({"status": "error", "message": "Invalid email or password"}), 401
+
+    # Check password
+    if not user.check_password(data["password"]):
+        return jsonify({"status": "error", "message": "Invalid email or password"}), 401
+
+    # Login the user
+    login_user(user)
+
+    # Return success response
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "Logged in successfully",
+                "user": {"id": user.id, "name": user.name, "email": user.email},
+            }
+        ),
+        200,
+    )
+
+
+@blueprint.route("/api/auth/logout")
+@login_required
+def logout():
+    """
+    Log out the current user by removing their session.
+    """
+    logout_user()
+    return jsonify({"status": "success", "message": "Logged out successfully!"})
+
+
+@blueprint.route("/logout")
+@login_required
+def logout_page():
+    """
+    Logout page that redirects to login page after logging out
+    """
+    logout_user()
+    return redirect("/login")
@@ -0,0 +1,62 @@
+"""Bookmarking routes."""
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+from models import Bookmark
+from models.versions import PREFERENCES, USERS, get_versions
+from web.conditional import conditional
+from .auth import get_user
+
+blueprint = Blueprint("bookmarks", __name__)
+
+
+def bookmarks_fingerprint():
+    """Fingerprint of the bookmarks, which embed the users and their preferences"""
+    count, newest_id = Bookmark.get_version(current_user.id)
+    return (current_user.id, count, newest_id) + get_versions(PREFERENCES, USERS)
+
+
+@blueprint.route("/api/bookmarks", methods=["GET"])
+@login_required
+@conditional(bookmarks_fingerprint)
+def get_bookmarks():
+    """Get current user's bookmarked profiles"""
+    try:
+        bookmarks, next_page_token = Bookmark.get_by_user(
+            current_user.id,
+            limit=request.args.get("limit", type=int),
+            page_token=request.args.get("page_token"),
+        )
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid page token"}), 400
+
+    return jsonify(
+        {"status": "success", "data": bookmarks, "next_page_token": next_page_token}
+    )
+
+
+@blueprint.route("/api/bookmarks/<user_id>", methods=["POST"])
+@login_required
+def add_bookmark(user_id):
+    """Bookmark a user profile"""
+    # Validate target user exists
+    target_user = get_user(user_id)
+    if not target_user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    # Add bookmark, the unique bookmark index rejects duplicates
+    if not Bookmark.add(current_user.id, user_id):
+        return jsonify({"status": "error", "message": "User already bookmarked"}), 409
+
+    return jsonify({"status": "success", "message": "User bookmarked successfully"})
+
+
+@blueprint.route("/api/bookmarks/<user_id>", methods=["DELETE"])
+@login_required
+def remove_bookmark(user_id):
+    """Remove a bookmarked profile"""
+    # Remove bookmark
+    if not Bookmark.remove(current_user.id, user_id):
+        return jsonify({"status": "error", "message": "Bookmark not found"}), 404
+
+    return jsonify({"status": "success", "message": "Bookmark removed successfully"})
@@ -0,0 +1,142 @@
+"""Realtime event delivery over Server-Sent Events, with a long-poll fallback."""
+
+import threading
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_login import current_user, login_required
+from models.events import event_bus
+
+blueprint = Blueprint("events", __name__)
+
+# Realtime delivery settings (seconds)
+EVENT_STREAM_HEARTBEAT = 15
+LONG_POLL_TIMEOUT = 25
+# Streams are closed after this long and the browser reconnects, so open
+# tabs take turns with the connection slots
+EVENT_STREAM_MAX_AGE = 300
+
+_connection_slots = None
+_connection_slots_lock = threading.Lock()
+
+
+def _acquire_connection():
+    """
+    Take one of the MAX_EVENT_CONNECTIONS slots of this process. Each open
+    stream or long poll holds a server thread, so the limit keeps them from
+    starving regular requests. Returns a function releasing the slot, or
+    None when every slot is taken.
+    """
+    global _connection_slots
+    limit = current_app.config.get("MAX_EVENT_CONNECTIONS")
+    if limit is None:
+        return lambda: None
+    with _connection_slots_lock:
+        if _connection_slots is None:
+            _connection_slots = threading.BoundedSemaphore(limit) if limit else None
+    if _connection_slots is None or not _connection_slots.acquire(blocking=False):
+        return None
+    return _connection_slots.release
+
+
+def _busy():
+    """Response asking the client to retry later, relying on its fallback poll."""
+    response = jsonify({"status": "error", "message": "Too many event connections"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+
+def parse_event_id(value):
+    """Parse an event ID sent by a client, or return None if it is missing or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event, json_provider):
+    """Encode an event as a Server-Sent Events message."""
+    return (
+        f"id: {event['id']}\n"
+        f"event: {event['type']}\n"
+        f"data: {json_provider.dumps(event['data'])}\n\n"
+    )
+
+
+def _last_event_id():
+    """Parse the last event ID the client has seen, if it sent one."""
+    return parse_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+
+
+@blueprint.route("/api/events/stream", methods=["GET"])
+@login_required
+def stream_events():
+    """Stream realtime events for current user as Server-Sent Events"""
+    release = _acquire_connection()
+    if release is None:
+        return _busy()
+
+    user_id = current_user.id
+    last_id = _last_event_id()
+    if last_id is None:
+        last_id = event_bus.last_event_id()
+    # The generator runs after the request context is gone
+    json_provider = current_app.json
+
+    def generate():
+        nonlocal last_id
+        yield "retry: 5000\n\n"
+        closes_at = time.monotonic() + EVENT_STREAM_MAX_AGE
+        while time.monotonic() < closes_at:
+            events = event_bus.wait(user_id, last_id, timeout=EVENT_STREAM_HEARTBEAT)
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                last_id = event["id"]
+                yield format_event(event, json_provider)
+
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Runs however the stream ends, even if it never started
+    response.call_on_close(release)
+    return response
+
+
+@blueprint.route("/api/events", methods=["GET"])
+@login_required
+def poll_events():
+    """Long-poll fallback for clients that cannot use the event stream"""
+    last_id = _last_event_id()
+
+    # A client without a last event ID only needs a starting point
+    if last_id is None:
+        return jsonify(
+            {"status": "success", "data": [], "last_event_id": event_bus.last_event_id()}
+        )
+
+    release = _acquire_connection()
+    if release is None:
+        return _busy()
+
+    timeout = request.args.get("timeout", LONG_POLL_TIMEOUT, type=float)
+    try:
+        events = event_bus.wait(
+            current_user.id, last_id, timeout=max(0, min(timeout, LONG_POLL_TIMEOUT))
+        )
+    finally:
+        release()
+
+    return jsonify(
+        {
+            "status": "success",
+            "data": events,
+            "last_event_id": events[-1]["id"] if events else last_id,
+        }
+    )
@@ -0,0 +1,40 @@
+"""Liveness and readiness endpoints."""
+
+from flask import Blueprint, current_app, jsonify
+from pymongo.errors import PyMongoError
+from models.db import ping, pool_stats
+from models.indexes import indexes_ready
+
+blueprint = Blueprint("health", __name__)
+
+
+@blueprint.route("/api/hello_world", methods=["GET"])
+def health_check():
+    """Health check endpoint to verify API is running"""
+    return jsonify({"status": "success", "message": "API is running"})
+
+
+@blueprint.route("/api/ready", methods=["GET"])
+def readiness_check():
+    """
+    Readiness endpoint: only succeeds when MongoDB answers a ping and the
+    declared indexes exist. With ENSURE_INDEXES set, missing indexes are
+    created here too, unless MongoDB has already rejected creating them
+    """
+    try:
+        ping()
+        ready = indexes_ready(create=current_app.config["ENSURE_INDEXES"])
+    except PyMongoError as e:
+        current_app.logger.error(f"Readiness check failed: {str(e)}")
+        return (
+            jsonify({"status": "error", "message": "Database unavailable"}),
+            503,
+        )
+    if not ready:
+        return (
+            jsonify({"status": "error", "message": "Database indexes missing"}),
+            503,
+        )
+    # Pool statistics stay in the logs; this endpoint is unauthenticated
+    current_app.logger.debug(f"MongoDB pool: {pool_stats()}")
+    return jsonify({"status": "success"})
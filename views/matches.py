@@ -0,0 +1,61 @@
+"""Travel partner matching and search routes."""
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+from models import TravelPreference
+from models.matching import matching_engine
+from models.versions import USERS, get_versions
+from web.conditional import conditional
+
+blueprint = Blueprint("matches", __name__)
+
+
+def matches_fingerprint():
+    """Fingerprint of the matches, which also embed the matched users' profiles"""
+    return (current_user.id, matching_engine.get_version()) + get_versions(USERS)
+
+
+@blueprint.route("/api/matches", methods=["GET"])
+@login_required
+@conditional(matches_fingerprint)
+def get_matches():
+    """Get travel partner matches for current user"""
+    try:
+        matches, next_page_token = TravelPreference.find_matches(
+            current_user.id,
+            limit=request.args.get("limit", type=int),
+            page_token=request.args.get("page_token"),
+        )
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid page token"}), 400
+
+    return jsonify(
+        {"status": "success", "data": matches, "next_page_token": next_page_token}
+    )
+
+
+@blueprint.route("/api/matches/search", methods=["POST"])
+@login_required
+def search_matches():
+    """Search for travel partners based on specific criteria"""
+    data = request.get_json()
+    if not data:
+        return (
+            jsonify({"status": "error", "message": "No search criteria provided"}),
+            400,
+        )
+
+    # Search by criteria, paging parameters travel with the criteria
+    try:
+        matches, next_page_token = TravelPreference.search_by_criteria(
+            data, limit=data.get("limit"), page_token=data.get("page_token")
+        )
+    except (TypeError, ValueError):
+        return (
+            jsonify({"status": "error", "message": "Invalid paging parameters"}),
+            400,
+        )
+
+    return jsonify(
+        {"status": "success", "data": matches, "next_page_token": next_page_token}
+    )
@@ -0,0 +1,106 @@
+"""Messaging routes."""
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+from models import Message, Notification
+from web.conditional import conditional
+from web.serializers import serialize_message
+from .auth import get_user
+
+blueprint = Blueprint("messages", __name__)
+
+
+def messages_fingerprint(user_id):
+    """Fingerprint of the messages response, which changes with the conversation"""
+    return (
+        current_user.id,
+        Message.get_conversation_updated_at(current_user.id, user_id),
+    )
+
+
+def mark_messages_read(user_id):
+    """Clear the conversation's unread count, even when answering with 304"""
+    Message.mark_conversation_read(current_user.id, user_id)
+
+
+@blueprint.route("/api/messages", methods=["GET"])
+@login_required
+def get_conversations():
+    """Get all conversations for current user"""
+    conversations = Message.get_conversations(current_user.id)
+
+    return jsonify({"status": "success", "data": conversations})
+
+
+@blueprint.route("/api/messages/<user_id>", methods=["GET"])
+@login_required
+@conditional(messages_fingerprint, always=mark_messages_read)
+def get_messages(user_id):
+    """Get messages between current user and another user"""
+    # Validate target user exists
+    target_user = get_user(user_id)
+    if not target_user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    # Parse paging parameters
+    before = request.args.get("before")
+    after = request.args.get("after")
+    limit = request.args.get("limit", type=int)
+
+    # Get messages
+    try:
+        messages, has_more = Message.get_conversation(
+            current_user.id, user_id, before=before, after=after, limit=limit
+        )
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+
+    # Format messages for response
+    formatted_messages = [serialize_message(message) for message in messages]
+
+    # Cursors for loading older messages and for polling newer ones
+    paging = {
+        "before": Message.encode_cursor(messages[0]) if messages else before,
+        "after": Message.encode_cursor(messages[-1]) if messages else after,
+        "has_more": has_more,
+    }
+
+    return jsonify(
+        {"status": "success", "data": formatted_messages, "paging": paging}
+    )
+
+
+@blueprint.route("/api/messages/<user_id>", methods=["POST"])
+@login_required
+def send_message(user_id):
+    """Send a message to another user"""
+    # Validate target user exists
+    target_user = get_user(user_id)
+    if not target_user:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    data = request.get_json()
+    if not data or "content" not in data:
+        return (
+            jsonify({"status": "error", "message": "No message content provided"}),
+            400,
+        )
+
+    # Send message
+    message = Message.send(current_user.id, user_id, data["content"])
+
+    # Create notification for recipient
+    sender_name = current_user.name
+    Notification.create(
+        user_id,
+        "message",
+        f"You received a new message from {sender_name}",
+        str(
+            current_user.id
+        ),  # Store the sender's ID as related_id for message notifications
+    )
+
+    # Format message for response
+    formatted_message = serialize_message(message)
+
+    return jsonify({"status": "success", "data": formatted_message}), 201
@@ -0,0 +1,131 @@
+"""Notification routes."""
+
+import datetime
+from bson import ObjectId
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+from models import Notification
+from web.conditional import conditional
+from web.serializers import serialize_notification
+
+blueprint = Blueprint("notifications", __name__)
+
+# Maximum number of notification IDs accepted by a batch update
+MAX_BATCH_NOTIFICATIONS = 1000
+
+
+def notifications_fingerprint():
+    """Fingerprint of the notifications response, from the user's counter"""
+    version = Notification.get_version(current_user.id)
+    return (current_user.id,) + version if version else None
+
+
+@blueprint.route("/api/notifications", methods=["GET"])
+@login_required
+@conditional(notifications_fingerprint)
+def get_notifications():
+    """Get a page of notifications for current user"""
+    try:
+        notifications, next_page_token = Notification.get_by_user_id(
+            current_user.id,
+            limit=request.args.get("limit", type=int),
+            before=request.args.get("before"),
+        )
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid notification ID"}), 400
+
+    # Format notifications for response
+    formatted_notifications = [
+        serialize_notification(notification) for notification in notifications
+    ]
+
+    return jsonify(
+        {
+            "status": "success",
+            "data": formatted_notifications,
+            "next_page_token": next_page_token,
+        }
+    )
+
+
+@blueprint.route("/api/notifications/unread_count", methods=["GET"])
+@login_required
+def get_unread_notification_count():
+    """Get the number of unread notifications for current user"""
+    return jsonify(
+        {
+            "status": "success",
+            "data": {"unread_count": Notification.get_unread_count(current_user.id)},
+        }
+    )
+
+
+@blueprint.route("/api/notifications", methods=["PUT"])
+@login_required
+def mark_notifications_read():
+    """
+    Mark many notifications as read at once: the notifications listed in
+    "ids", those created before the ISO timestamp "before", or all of them
+    when "all" is true
+    """
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    notification_ids = data.get("ids")
+    if notification_ids is not None:
+        if not isinstance(notification_ids, list) or not all(
+            ObjectId.is_valid(n) for n in notification_ids
+        ):
+            return (
+                jsonify({"status": "error", "message": "Invalid notification IDs"}),
+                400,
+            )
+        if len(notification_ids) > MAX_BATCH_NOTIFICATIONS:
+            return (
+                jsonify({"status": "error", "message": "Too many notification IDs"}),
+                400,
+            )
+
+    before = data.get("before")
+    if before is not None:
+        try:
+            before = datetime.datetime.fromisoformat(before.replace("Z", "+00:00"))
+        except (AttributeError, ValueError):
+            return jsonify({"status": "error", "message": "Invalid timestamp"}), 400
+        # Notifications are stored with naive local timestamps
+        if before.tzinfo is not None:
+            before = before.astimezone().replace(tzinfo=None)
+
+    if notification_ids is None and before is None and data.get("all") is not True:
+        return (
+            jsonify({"status": "error", "message": "No notifications selected"}),
+            400,
+        )
+
+    modified_count = Notification.mark_many_as_read(
+        current_user.id, notification_ids=notification_ids, before=before
+    )
+
+    return jsonify(
+        {
+            "status": "success",
+            "data": {
+                "modified_count": modified_count,
+                "unread_count": Notification.get_unread_count(current_user.id),
+            },
+        }
+    )
+
+
+@blueprint.route("/api/notifications/<notification_id>", methods=["PUT"])
+@login_required
+def mark_notification_read(notification_id):
+    """Mark a notification as read"""
+
+    if not ObjectId.is_valid(notification_id):
+        return jsonify({"status": "error", "message": "Invalid notification ID"}), 400
+
+    if not Notification.mark_as_read(notification_id, current_user.id):
+        return jsonify({"status": "error", "message": "Notification not found"}), 404
+    return jsonify({"status": "success", "message": "Notification marked as read"}), 200
@@ -0,0 +1,108 @@
+"""HTML page routes and error pages."""
+
+from bson import ObjectId
+from flask import Blueprint, abort, current_app, redirect, render_template
+from flask_login import current_user, login_required
+from .auth import get_user
+
+blueprint = Blueprint("pages", __name__)
+
+
+# Pages that are static shells filling in their data with fetch. The
+# messages page is served by messages_dashboard, which requires a login.
+VALID_PAGES = frozenset(
+    {
+        "index",
+        "login",
+        "register",
+        "profile",
+        "preferences",
+        "matches",
+        "bookmarks",
+    }
+)
+
+
+# Route to serve HTML templates
+@blueprint.route("/", defaults={"page_name": "index"})
+@blueprint.route("/<page_name>")
+def serve_page(page_name):
+    """
+    Serve the HTML page shells from the rendered page cache
+    """
+    # For root route, redirect logged-in users to profile page
+    if page_name == "index" and current_user.is_authenticated:
+        return redirect("/profile")
+
+    # Check if the requested page exists
+    if page_name not in VALID_PAGES:
+        abort(404)
+
+    return current_app.extensions["page_cache"].response(
+        page_name, current_user.is_authenticated
+    )
+
+
+@blueprint.route("/profile/<user_id>")
+def user_profile(user_id):
+    """
+    Serve a specific user's profile page
+    """
+    try:
+        user = get_user(user_id)
+
+        if not user:
+            abort(404)
+
+        return render_template(
+            "user_profile.html",
+            user=user,
+            user_id=user_id,
+            active_page="profile",
+        )
+    except Exception as e:
+        current_app.logger.error("Error serving user profile for %s: %s", user_id, str(e))
+        abort(404)
+
+
+@blueprint.route("/messages/<user_id>")
+@login_required
+def view_messages(user_id):
+    """
+    Serve the message view page for a specific user
+    """
+    try:
+        # Convert user_id to ObjectId for MongoDB query
+        user_id_obj = ObjectId(user_id)
+        # Return the message view template with the user_id
+        return render_template(
+            "message_view.html",
+            user_id=user_id,
+            current_user=current_user,
+            active_page="messages",
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error serving messages for {user_id}: {str(e)}")
+        abort(404)
+
+
+@blueprint.route("/messages")
+@login_required
+def messages_dashboard():
+    """
+    Serve the messages dashboard page showing all conversations
+    """
+    return render_template("messages.html", active_page="messages")
+
+
+# Error handlers
+@blueprint.app_errorhandler(404)
+def page_not_found(e):
+    """Handle 404 errors"""
+    return render_template("404.html"), 404
+
+
+@blueprint.app_errorhandler(500)
+def server_error(e):
+    """Handle 500 errors"""
+    return render_template("500.html"), 500
@@ -0,0 +1,91 @@
+"""Travel preference routes."""
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+from models import Notification, TravelPreference
+from web.conditional import conditional
+from web.serializers import serialize_preferences
+
+blueprint = Blueprint("preferences", __name__)
+
+
+def preferences_fingerprint():
+    """Fingerprint of the preferences response, which changes with every update"""
+    return (current_user.id, TravelPreference.get_updated_at(current_user.id))
+
+
+@blueprint.route("/api/preferences", methods=["GET"])
+@login_required
+@conditional(preferences_fingerprint)
+def get_preferences():
+    """Get current user's travel preferences"""
+    preferences = TravelPreference.get_by_user_id(current_user.id)
+
+    if not preferences:
+        return jsonify({"status": "success", "data": None})
+
+    # Format preferences for response
+    formatted_preferences = serialize_preferences(preferences)
+
+    return jsonify({"status": "success", "data": formatted_preferences})
+
+
+@blueprint.route("/api/preferences", methods=["POST"])
+@login_required
+def create_preferences():
+    """Create travel preferences for current user"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    # Create or update preferences
+    preferences = TravelPreference.create_or_update(current_user.id, data)
+
+    # Create notification
+    Notification.create(
+        current_user.id, "preferences", "Your travel preferences have been updated."
+    )
+
+    # Format preferences for response
+    formatted_preferences = serialize_preferences(preferences)
+
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "Preferences created successfully",
+                "data": formatted_preferences,
+            }
+        ),
+        201,
+    )
+
+
+@blueprint.route("/api/preferences", methods=["PUT"])
+@login_required
+def update_preferences():
+    """Update current user's travel preferences"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    # Update existing preferences only
+    preferences = TravelPreference.create_or_update(current_user.id, data, upsert=False)
+    if not preferences:
+        return jsonify({"status": "error", "message": "Preferences not found"}), 404
+
+    # Create notification
+    Notification.create(
+        current_user.id, "preferences", "Your travel preferences have been updated."
+    )
+
+    # Format preferences for response
+    formatted_preferences = serialize_preferences(preferences)
+
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Preferences updated successfully",
+            "data": formatted_preferences,
+        }
+    )
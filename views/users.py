@@ -0,0 +1,188 @@
+"""Routes for the current user's profile, account deletion and public profiles."""
+
+import datetime
+from bson import ObjectId
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user, login_required, logout_user
+from pymongo import ReturnDocument
+from models import DeletionJob, PublicProfile, TravelPreference, User
+from models.db import db
+from models.matching import matching_engine
+from models.versions import USERS, bump_version
+from web.conditional import conditional
+
+blueprint = Blueprint("users", __name__)
+
+
+def profile_fingerprint():
+    """Fingerprint of the profile response, which changes whenever it would"""
+    return (
+        current_user.id,
+        current_user.updated_at,
+        TravelPreference.get_updated_at(current_user.id),
+    )
+
+
+@blueprint.route("/api/users/profile", methods=["GET"])
+@login_required
+@conditional(profile_fingerprint)
+def get_user_profile():
+    """Get current user's profile"""
+    # Get user profile data
+    user_profile = {
+        "id": current_user.id,
+        "name": current_user.name,
+        "email": current_user.email,
+        "profile_picture": current_user.profile_picture,
+        "created_at": current_user.created_at,
+    }
+
+    # Get travel preferences if they exist
+    preferences = TravelPreference.get_by_user_id(current_user.id)
+    if preferences:
+        user_profile["preferences"] = {
+            "budget": preferences.get("budget", ""),
+            "travel_style": preferences.get("travel_style", ""),
+            "food_preferences": preferences.get("food_preferences", []),
+            "accommodation_type": preferences.get("accommodation_type", ""),
+            "destination": preferences.get("destination", ""),
+            "arrival_time": preferences.get("arrival_time", ""),
+        }
+
+    return jsonify({"status": "success", "data": user_profile})
+
+
+@blueprint.route("/api/users/profile", methods=["PUT"])
+@login_required
+def update_user_profile():
+    """Update current user's profile"""
+    data = request.get_json()
+    if not data:
+        return jsonify({"status": "error", "message": "No data provided"}), 400
+
+    # Fields that can be updated
+    allowed_fields = ["name", "profile_picture"]
+    update_data = {}
+
+    for field in allowed_fields:
+        if field in data:
+            update_data[field] = data[field]
+
+    if not update_data:
+        return jsonify({"status": "error", "message": "No valid fields to update"}), 400
+
+    # Update the user in database and get the updated document back
+    updated_user = db.users.find_one_and_update(
+        {"_id": ObjectId(current_user.id)},
+        {"$set": dict(update_data, updated_at=datetime.datetime.now())},
+        return_document=ReturnDocument.AFTER,
+    )
+    User.invalidate(current_user.id)
+    PublicProfile.invalidate(current_user.id)
+    # Matches and bookmarks embed the name and picture
+    bump_version(USERS)
+
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Profile updated successfully",
+            "data": {
+                "id": str(updated_user["_id"]),
+                "name": updated_user.get("name", ""),
+                "email": updated_user.get("email", ""),
+                "profile_picture": updated_user.get("profile_picture", ""),
+            },
+        }
+    )
+
+
+@blueprint.route("/api/users/profile", methods=["DELETE"])
+@login_required
+def delete_user_profile():
+    """
+    Delete current user's account. The account is disabled immediately and
+    its data is purged in the background.
+    """
+    user_id = current_user.id
+
+    job = DeletionJob.start(user_id)
+    if not job:
+        return jsonify({"status": "error", "message": "User not found"}), 404
+
+    # Stop serving the user from caches and matches right away
+    User.invalidate(user_id)
+    PublicProfile.invalidate(user_id)
+    matching_engine.remove(ObjectId(user_id))
+    bump_version(USERS)
+
+    # Logout user
+    logout_user()
+
+    return (
+        jsonify(
+            {
+                "status": "success",
+                "message": "Account deletion started",
+                "data": {"token": job["token"]},
+            }
+        ),
+        202,
+    )
+
+
+@blueprint.route("/api/users/deletion/<token>", methods=["GET"])
+def get_deletion_status(token):
+    """
+    Get the progress of an account deletion, using the token returned when
+    it started. The account is already logged out, so the token is the
+    only credential.
+    """
+    job = DeletionJob.get_status(token)
+    if not job:
+        return jsonify({"status": "error", "message": "Deletion job not found"}), 404
+
+    return jsonify(
+        {
+            "status": "success",
+            "data": {
+                "status": job["status"],
+                "deleted": job.get("deleted", {}),
+                "updated_at": job["updated_at"],
+            },
+        }
+    )
+
+
+@blueprint.route("/api/users/public/<user_id>", methods=["GET"])
+@login_required
+def get_public_user_profile(user_id):
+    """
+    Get a specific user's public profile data.
+    """
+    try:
+        profile = PublicProfile.get(user_id)
+
+        if not profile:
+            return jsonify({"status": "error", "message": "User not found"}), 404
+
+        # Let clients revalidate with If-None-Match / If-Modified-Since
+        response = jsonify({"status": "success", "data": profile["data"]})
+        response.set_etag(profile["etag"])
+        response.last_modified = profile["last_modified"].astimezone(
+            datetime.timezone.utc
+        )
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching user profile: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "message": f"Error retrieving user profile: {str(e)}",
+                }
+            ),
+            500,
+        )
@@ -0,0 +1 @@
+"""HTTP-layer helpers shared by the Flask app: caching, serialization and middleware."""
@@ -0,0 +1,141 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`build_assets` copies each file under static/ to static/dist/ with a content
+hash in its name, writes .gz (and .br when brotli is installed) variants next
+to it and records the mapping in static/dist/manifest.json. Templates link to
+the hashed names through `asset_url`, so the files can be cached forever.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from flask import abort, request, send_from_directory
+from werkzeug.security import safe_join
+
+from .compression import brotli, accepted_encodings
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# Extensions worth precompressing
+COMPRESSIBLE_EXTENSIONS = frozenset({".css", ".js", ".svg", ".html", ".txt", ".json"})
+
+# One year; hashed file names never change content
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _fingerprint(path):
+    """Return the first 12 hex digits of a file's SHA-256."""
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+
+def build_assets(static_folder):
+    """Write hashed and precompressed copies of every static file and return the manifest."""
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [name for name in dirs if name != DIST_DIR]
+        for name in files:
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_folder).replace(os.sep, "/")
+            stem, ext = os.path.splitext(relative)
+            hashed = f"{stem}.{_fingerprint(source)}{ext}"
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            with open(source, "rb") as file:
+                data = file.read()
+            with open(target, "wb") as file:
+                file.write(data)
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                with open(target + ".gz", "wb") as file:
+                    file.write(gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + ".br", "wb") as file:
+                        file.write(brotli.compress(data, quality=11))
+
+            manifest[relative] = hashed
+
+    with open(os.path.join(dist_folder, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    return manifest
+
+
+class Assets:
+    """
+    Serves built assets from /assets/ with far-future cache headers, picking
+    the precompressed variant the client accepts, and exposes `asset_url` to
+    templates. Without a manifest, `asset_url` falls back to /static/.
+    """
+
+    def __init__(self, app=None):
+        self.dist_folder = None
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Load the manifest and register the route and template global."""
+        self.dist_folder = os.path.join(app.static_folder, DIST_DIR)
+        self.manifest = self.load_manifest()
+        app.add_url_rule("/assets/<path:filename>", "assets", self.serve)
+        app.add_template_global(self.asset_url, "asset_url")
+        app.extensions["assets"] = self
+
+    def load_manifest(self):
+        """Read the manifest written by build_assets, or an empty one."""
+        try:
+            with open(os.path.join(self.dist_folder, MANIFEST_NAME), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def asset_url(self, filename):
+        """Return the URL of a static file, fingerprinted when it has been built."""
+        hashed = self.manifest.get(filename)
+        if hashed is None:
+            return f"/static/{filename}"
+        return f"/assets/{hashed}"
+
+    def serve(self, filename):
+        """Send a built asset, precompressed when the client allows it."""
+        if filename.endswith((".gz", ".br")) or filename == MANIFEST_NAME:
+            abort(404)
+        path = safe_join(self.dist_folder, filename)
+        if path is None:
+            abort(404)
+
+        encodings = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = None
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if candidate in encodings and os.path.isfile(path + suffix):
+                encoding = candidate
+                break
+
+        if encoding is None:
+            response = send_from_directory(self.dist_folder, filename, max_age=ASSET_MAX_AGE)
+        else:
+            suffix = ".br" if encoding == "br" else ".gz"
+            response = send_from_directory(
+                self.dist_folder,
+                filename + suffix,
+                max_age=ASSET_MAX_AGE,
+                mimetype=_guess_mimetype(filename),
+                etag=False,
+            )
+            response.headers["Content-Encoding"] = encoding
+
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+def _guess_mimetype(filename):
+    """Content type of the uncompressed file."""
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
@@ -0,0 +1,133 @@
+"""
+Response compression with gzip, or brotli when it is installed.
+"""
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Responses smaller than this (bytes) are sent as they are
+DEFAULT_MIN_SIZE = 500
+
+# Only these content types are compressed; images and fonts already are
+DEFAULT_MIMETYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+        "image/svg+xml",
+    }
+)
+
+
+def accepted_encodings(header):
+    """Return the encodings from an Accept-Encoding header with a non-zero q."""
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header):
+    """Pick the best encoding this server can produce for an Accept-Encoding header."""
+    encodings = accepted_encodings(header)
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+def compress_body(data, encoding, level=6):
+    """Compress a complete body with "br" or "gzip"."""
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class Compress:
+    """
+    Compresses responses in an after_request hook. Responses below the size
+    threshold, outside the content type allowlist, already encoded, or sent
+    as files are left alone. Streamed responses are compressed chunk by chunk
+    and flushed after each one so clients see data as it is produced.
+    """
+
+    def __init__(self, app=None):
+        self.min_size = DEFAULT_MIN_SIZE
+        self.mimetypes = DEFAULT_MIMETYPES
+        self.level = 6
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read settings from the app config and register the hook."""
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+        self.mimetypes = frozenset(app.config.get("COMPRESS_MIMETYPES", DEFAULT_MIMETYPES))
+        self.level = app.config.get("COMPRESS_LEVEL", 6)
+        app.after_request(self.after_request)
+
+    def after_request(self, response):
+        """Compress the response if the client accepts it and it is worth it."""
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(compress_body(data, encoding, self.level))
+
+        response.headers["Content-Encoding"] = encoding
+        # The representation changed, so a strong ETag no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compress_stream(self, chunks, encoding):
+        """Compress an iterable body, flushing after every chunk."""
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=min(self.level, 11))
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+            return
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
@@ -0,0 +1,58 @@
+"""
+Conditional GET support for JSON read endpoints using weak ETags.
+"""
+import functools
+import hashlib
+from flask import current_app, make_response, request
+
+
+def weak_etag(*parts):
+    """Build an ETag value from cheap fingerprint parts."""
+    return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _mark_revalidate(response, etag):
+    """Attach the ETag and ask clients to revalidate before reusing the response."""
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def conditional(fingerprint, always=None):
+    """
+    Decorator for read-only views. `fingerprint` is called with the view's
+    arguments and returns a tuple of values that change whenever the response
+    would, or None when no fingerprint is available. The values must come
+    from stored state, such as an updated_at timestamp, the newest _id or a
+    models.versions counter, never from per-process state, so every worker
+    derives the same ETag. The weak ETag derived from it (and the request
+    path and query string) is compared with If-None-Match before the view
+    runs, so unchanged data is answered with 304 without being loaded or
+    serialized.
+
+    `always`, if given, is called with the view's arguments on every
+    request, including those answered with 304, for side effects such as
+    marking a conversation as read.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if always is not None:
+                always(*args, **kwargs)
+            parts = fingerprint(*args, **kwargs)
+            if parts is None:
+                return view(*args, **kwargs)
+
+            etag = weak_etag(request.full_path, *parts)
+            if request.if_none_match.contains_weak(etag):
+                return _mark_revalidate(current_app.response_class(status=304), etag)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _mark_revalidate(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
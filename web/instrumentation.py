@@ -0,0 +1,182 @@
+"""
+Per-request MongoDB instrumentation: command counts, database time and the
+slowest command, reported as a Server-Timing header and a structured log line.
+"""
+import contextvars
+import json
+import logging
+import time
+from flask import current_app, g, has_request_context, request
+from pymongo import monitoring
+from models.db import add_event_listener
+
+logger = logging.getLogger(__name__)
+
+# Default budgets; a request over any of them is logged as a warning
+DEFAULT_BUDGETS = {
+    "commands": 10,
+    "db_ms": 100.0,
+    "total_ms": 500.0,
+}
+
+
+class RequestStats:
+    """Database activity of one request."""
+
+    __slots__ = ("commands", "db_ms", "slowest", "pending")
+
+    def __init__(self):
+        self.commands = 0
+        self.db_ms = 0.0
+        # (command name, collection, milliseconds)
+        self.slowest = None
+        self.pending = {}
+
+    def finish(self, request_id, duration_micros):
+        """Record a completed command."""
+        name, collection = self.pending.pop(request_id, ("unknown", None))
+        elapsed = duration_micros / 1000
+        self.db_ms += elapsed
+        if self.slowest is None or elapsed > self.slowest[2]:
+            self.slowest = (name, collection, elapsed)
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    """
+    Adds each command to the stats of the request that issued it. pymongo
+    publishes events on the calling thread, so the current request is the one
+    in flask.g; requests served natively under ASGI keep their stats in
+    `async_request_stats` instead, which motor carries to its executor
+    threads. Commands from background threads are ignored.
+    """
+
+    def _stats(self):
+        """Return the stats of the request in this context, or None."""
+        if not has_request_context():
+            return async_request_stats.get()
+        return g.get("db_stats")
+
+    def started(self, event):
+        stats = self._stats()
+        if stats is None:
+            return
+        stats.commands += 1
+        collection = event.command.get(event.command_name)
+        stats.pending[event.request_id] = (
+            event.command_name,
+            collection if isinstance(collection, str) else None,
+        )
+
+    def succeeded(self, event):
+        stats = self._stats()
+        if stats is not None:
+            stats.finish(event.request_id, event.duration_micros)
+
+    def failed(self, event):
+        stats = self._stats()
+        if stats is not None:
+            stats.finish(event.request_id, event.duration_micros)
+
+
+command_listener = RequestCommandListener()
+
+# Stats of the request served natively by asgi.py in the current context
+async_request_stats = contextvars.ContextVar("async_request_stats", default=None)
+
+
+class Instrumentation:
+    """
+    Collects RequestStats for every request, sends them to clients in a
+    Server-Timing header when SERVER_TIMING is set or the app runs in debug
+    mode, and logs one JSON line per request. Budgets come from
+    REQUEST_BUDGETS, which holds defaults under "default" and per-endpoint
+    overrides under the endpoint name, e.g.
+    {"messages.get_conversations": {"commands": 3}}.
+    """
+
+    def __init__(self, app=None):
+        self.server_timing = False
+        self.budgets = {"default": dict(DEFAULT_BUDGETS)}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the command listener and request hooks."""
+        self.server_timing = app.config.get("SERVER_TIMING", False)
+        for endpoint, budget in app.config.get("REQUEST_BUDGETS", {}).items():
+            self.budgets.setdefault(endpoint, {}).update(budget)
+        add_event_listener(command_listener)
+        app.extensions["instrumentation"] = self
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def budget_for(self, endpoint):
+        """Return the budgets that apply to an endpoint."""
+        budget = dict(self.budgets["default"])
+        budget.update(self.budgets.get(endpoint, {}))
+        return budget
+
+    @staticmethod
+    def before_request():
+        """Start counting for this request."""
+        g.db_stats = RequestStats()
+        g.request_started = time.perf_counter()
+
+    def after_request(self, response):
+        """Report the request's database activity."""
+        stats = g.get("db_stats")
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+
+        header = self.timing_header(current_app, stats, total_ms)
+        if header is not None:
+            response.headers.add("Server-Timing", header)
+        self.log(
+            stats, total_ms, request.method, request.path, request.endpoint,
+            response.status_code,
+        )
+        return response
+
+    def timing_header(self, app, stats, total_ms):
+        """Return the Server-Timing header value of a request, or None if not sent."""
+        # The header names collections and commands, so it is opt-in
+        if not (self.server_timing or app.debug):
+            return None
+        metrics = [
+            f'db;desc="{stats.commands} commands";dur={stats.db_ms:.2f}',
+            f"app;dur={total_ms:.2f}",
+        ]
+        if stats.slowest is not None:
+            name, collection, elapsed = stats.slowest
+            label = f"{name} {collection}" if collection else name
+            metrics.append(f'db-slowest;desc="{label}";dur={elapsed:.2f}')
+        return ", ".join(metrics)
+
+    def log(self, stats, total_ms, method, path, endpoint, status):
+        """Log a request's JSON line, as a warning if it is over budget."""
+        budget = self.budget_for(endpoint)
+        measured = {"commands": stats.commands, "db_ms": stats.db_ms, "total_ms": total_ms}
+        over_budget = [key for key, limit in budget.items() if measured.get(key, 0) > limit]
+
+        record = {
+            "method": method,
+            "path": path,
+            "endpoint": endpoint,
+            "status": status,
+            "total_ms": round(total_ms, 2),
+            "db_commands": stats.commands,
+            "db_ms": round(stats.db_ms, 2),
+        }
+        if stats.slowest is not None:
+            name, collection, elapsed = stats.slowest
+            record["slowest"] = {
+                "command": name,
+                "collection": collection,
+                "ms": round(elapsed, 2),
+            }
+        if over_budget:
+            record["over_budget"] = over_budget
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
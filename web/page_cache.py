@@ -0,0 +1,70 @@
+"""
+Cache of rendered HTML pages whose content depends only on the template and
+whether the visitor is logged in, such as the page shells that load their
+data with fetch.
+"""
+import hashlib
+from flask import current_app, render_template, request
+from .compression import DEFAULT_MIN_SIZE, choose_encoding, compress_body
+
+
+class PageCache:
+    """
+    Renders each page once per login state and keeps the HTML, along with
+    compressed copies made on first request, for the life of the process.
+    Pages smaller than COMPRESS_MIN_SIZE are always sent uncompressed.
+    Responses carry a weak ETag so browsers revalidate with a 304. Disabled
+    when templates auto-reload, so edits show up during development.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = DEFAULT_MIN_SIZE
+        self._pages = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read settings from the app config and register the cache on the app."""
+        self.enabled = app.config.get("PAGE_CACHE", True) and not (
+            app.debug or app.config.get("TEMPLATES_AUTO_RELOAD")
+        )
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+        app.extensions["page_cache"] = self
+
+    def _render(self, page_name, authenticated):
+        """Return the cached entry for a page, rendering it if needed."""
+        key = (page_name, authenticated)
+        entry = self._pages.get(key)
+        if entry is None:
+            body = render_template(f"{page_name}.html", active_page=page_name).encode()
+            entry = {"etag": hashlib.md5(body).hexdigest(), None: body}
+            if self.enabled:
+                self._pages[key] = entry
+        return entry
+
+    def warm(self, app, page_names):
+        """Render pages for logged-out visitors ahead of the first request."""
+        if not self.enabled:
+            return
+        with app.test_request_context():
+            for page_name in page_names:
+                self._render(page_name, False)
+
+    def response(self, page_name, authenticated):
+        """Build a conditional response serving a page from the cache."""
+        entry = self._render(page_name, authenticated)
+        encoding = None
+        if len(entry[None]) >= self.min_size:
+            encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        body = entry.get(encoding)
+        if body is None:
+            body = entry[encoding] = compress_body(entry[None], encoding)
+
+        response = current_app.response_class(body, mimetype="text/html")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.update(("Accept-Encoding", "Cookie"))
+        response.set_etag(entry["etag"], weak=True)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
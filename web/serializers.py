@@ -0,0 +1,46 @@
+"""
+Serializers turning MongoDB documents into API response shapes. ObjectId and
+datetime values are left as they are for the JSON provider to encode.
+"""
+
+# Output keys of a preferences document with their defaults
+PREFERENCE_FIELDS = (
+    ("budget", ""),
+    ("travel_style", ""),
+    ("food_preferences", ()),
+    ("accommodation_type", ""),
+    ("destination", ""),
+    ("arrival_time", ""),
+    ("updated_at", None),
+)
+
+
+def serialize_message(doc):
+    """Build the response shape of a message."""
+    return {
+        "id": doc["_id"],
+        "sender_id": doc["sender_id"],
+        "recipient_id": doc["recipient_id"],
+        "content": doc["content"],
+        # Use timestamp instead of created_at for consistency
+        "timestamp": doc["created_at"],
+    }
+
+
+def serialize_notification(doc):
+    """Build the response shape of a notification."""
+    return {
+        "id": doc["_id"],
+        "content": doc["content"],
+        "read": doc["read"],
+        "created_at": doc["created_at"],
+        "type": doc.get("type", "general"),
+        "related_user_id": doc.get("related_id"),
+    }
+
+
+def serialize_preferences(doc):
+    """Build the response shape of a preferences document."""
+    data = {"id": doc["_id"]}
+    data.update((key, doc.get(key, default)) for key, default in PREFERENCE_FIELDS)
+    return data